@@ -25,13 +25,23 @@ class ChatScreen extends StatefulWidget {
 
 class _ChatScreenState extends State<ChatScreen> {
   List<dynamic> _messages = [];
+  String? _olderNext;
+  bool _isLoadingOlder = false;
   final TextEditingController _controller = TextEditingController();
   Timer? _timer;
 
   Future<void> _loadMessages() async {
     try {
-      _messages = await ApiService().getMessages(widget.ideaId);
-      setState(() {});
+      final page = await ApiService().getMessages(widget.ideaId);
+      // Keep earlier pages the user already loaded and swap in the latest one.
+      final latest = page.results;
+      final older = latest.isEmpty
+          ? _messages
+          : _messages.where((m) => m['id'] < latest.first['id']).toList();
+      setState(() {
+        if (older.isEmpty) _olderNext = page.next;
+        _messages = [...older, ...latest];
+      });
     } catch (e) {
       print('Error: $e');
       ScaffoldMessenger.of(context).showSnackBar(
@@ -40,6 +50,28 @@ class _ChatScreenState extends State<ChatScreen> {
     }
   }
 
+  Future<void> _loadOlderMessages() async {
+    if (_olderNext == null || _isLoadingOlder) return;
+    setState(() {
+      _isLoadingOlder = true;
+    });
+    try {
+      final page = await ApiService().getMessages(widget.ideaId, next: _olderNext);
+      setState(() {
+        _messages.insertAll(0, page.results);
+        _olderNext = page.next;
+        _isLoadingOlder = false;
+      });
+    } catch (e) {
+      setState(() {
+        _isLoadingOlder = false;
+      });
+      ScaffoldMessenger.of(context).showSnackBar(
+        SnackBar(content: Text('Error loading messages: $e')),
+      );
+    }
+  }
+
   @override
   void initState() {
     super.initState();
@@ -129,8 +161,24 @@ class _ChatScreenState extends State<ChatScreen> {
         children: [
           Expanded(
             child: ListView.builder(
-              itemCount: _messages.length,
+              itemCount: _messages.length + (_olderNext != null ? 1 : 0),
               itemBuilder: (context, index) {
+                if (_olderNext != null) {
+                  if (index == 0) {
+                    return Center(
+                      child: _isLoadingOlder
+                          ? Padding(
+                              padding: EdgeInsets.all(8.0),
+                              child: CircularProgressIndicator(color: Colors.purple[800]),
+                            )
+                          : TextButton(
+                              onPressed: _loadOlderMessages,
+                              child: Text('Load earlier messages', style: TextStyle(color: Colors.purple[800])),
+                            ),
+                    );
+                  }
+                  index -= 1;
+                }
                 final msg = _messages[index];
                 return ListTile(
                   title: Text(msg['sender']['username'] ?? 'Unknown'),
@@ -15,6 +15,8 @@ class CommentsScreen extends StatefulWidget {
 class _CommentsScreenState extends State<CommentsScreen> {
   List<Comment> _comments = [];
   bool _isLoading = true;
+  String? _next;
+  bool _isLoadingMore = false;
   final TextEditingController _commentController = TextEditingController();
   String? _userId;
 
@@ -25,6 +27,12 @@ class _CommentsScreenState extends State<CommentsScreen> {
     _loadComments();
   }
 
+  @override
+  void dispose() {
+    _commentController.dispose();
+    super.dispose();
+  }
+
   Future<void> _loadUserId() async {
     final prefs = await SharedPreferences.getInstance();
     setState(() {
@@ -34,9 +42,10 @@ class _CommentsScreenState extends State<CommentsScreen> {
 
   Future<void> _loadComments() async {
     try {
-      final comments = await ApiService().getComments(widget.ideaId);
+      final page = await ApiService().getComments(widget.ideaId);
       setState(() {
-        _comments = comments;
+        _comments = page.results;
+        _next = page.next;
         _isLoading = false;
       });
     } catch (e) {
@@ -49,6 +58,28 @@ class _CommentsScreenState extends State<CommentsScreen> {
     }
   }
 
+  Future<void> _loadMoreComments() async {
+    if (_next == null || _isLoadingMore) return;
+    setState(() {
+      _isLoadingMore = true;
+    });
+    try {
+      final page = await ApiService().getComments(widget.ideaId, next: _next);
+      setState(() {
+        _comments.addAll(page.results);
+        _next = page.next;
+        _isLoadingMore = false;
+      });
+    } catch (e) {
+      setState(() {
+        _isLoadingMore = false;
+      });
+      ScaffoldMessenger.of(context).showSnackBar(
+        SnackBar(content: Text('Error loading comments: $e')),
+      );
+    }
+  }
+
   Future<void> _addComment() async {
     final content = _commentController.text.trim();
     if (content.isEmpty) return;
@@ -56,7 +87,8 @@ class _CommentsScreenState extends State<CommentsScreen> {
     try {
       final newComment = await ApiService().postComment(widget.ideaId, content);
       setState(() {
-        _comments.add(newComment);
+        // Comments are listed newest first.
+        _comments.insert(0, newComment);
         _commentController.clear();
       });
     } catch (e) {
@@ -119,8 +151,16 @@ class _CommentsScreenState extends State<CommentsScreen> {
             child: _comments.isEmpty
                 ? Center(child: Text('No comments yet. Be the first!'))
                 : ListView.builder(
-              itemCount: _comments.length,
+              itemCount: _comments.length + (_next != null ? 1 : 0),
               itemBuilder: (context, index) {
+                if (index == _comments.length) {
+                  // Scrolled to the end: fetch the next page.
+                  WidgetsBinding.instance.addPostFrameCallback((_) => _loadMoreComments());
+                  return Padding(
+                    padding: EdgeInsets.all(16.0),
+                    child: Center(child: CircularProgressIndicator(color: Colors.purple[800])),
+                  );
+                }
                 final comment = _comments[index];
                 final isOwnComment = comment.user['id'].toString() == _userId;
                 return ListTile(
@@ -29,7 +29,7 @@ class HomeScreen extends StatefulWidget {
 class _HomeScreenState extends State<HomeScreen> {
   int _selectedIndex = 0;
   List<dynamic> _ideas = [];
-  int _currentPage = 1;
+  String? _nextCursor;
   bool _isLoadingMore = false;
   bool _hasMore = true;
   ScrollController _scrollController = ScrollController();
@@ -369,7 +369,7 @@ class _HomeScreenState extends State<HomeScreen> {
 
   Future<void> _loadIdeas() async {
     setState(() {
-      _currentPage = 1;
+      _nextCursor = null;
       _ideas = [];
       _hasMore = true;
       _isLoadingMore = false;
@@ -437,7 +437,7 @@ class _HomeScreenState extends State<HomeScreen> {
     try {
       final response = await ApiService().makeAuthenticatedRequest(
         request: (token) => http.get(
-          Uri.parse('${ApiService.baseUrl}ideas/list/?page=$_currentPage&t=${DateTime.now().millisecondsSinceEpoch}'),
+          Uri.parse('${ApiService.baseUrl}ideas/list/?${_nextCursor != null ? 'cursor=${Uri.encodeQueryComponent(_nextCursor!)}&' : ''}t=${DateTime.now().millisecondsSinceEpoch}'),
           headers: {'Authorization': 'Bearer $token', 'Cache-Control': 'no-cache'},
         ),
       );
@@ -449,6 +449,7 @@ class _HomeScreenState extends State<HomeScreen> {
         setState(() {
           _ideas.addAll(newIdeas); // Include all ideas
           _hasMore = data['next'] != null;
+          _nextCursor = _hasMore ? Uri.parse(data['next']).queryParameters['cursor'] : null;
           _isLoadingMore = false;
           for (var idea in newIdeas) {
             final user = idea['user'];
@@ -500,9 +501,6 @@ class _HomeScreenState extends State<HomeScreen> {
   }
 
   Future<void> _loadMoreIdeas() async {
-    setState(() {
-      _currentPage++;
-    });
     await _loadIdeasPage();
     setState(() {
       if (_ideas.isNotEmpty) {
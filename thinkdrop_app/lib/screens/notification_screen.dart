@@ -11,11 +11,15 @@ class NotificationScreen extends StatefulWidget {
 
 class _NotificationScreenState extends State<NotificationScreen> {
   List<dynamic> _notifications = [];
+  String? _next;
+  bool _isLoadingMore = false;
   String? _userId;
 
   Future<void> _loadNotifications() async {
     try {
-      _notifications = await ApiService().getNotifications();
+      final page = await ApiService().getNotifications();
+      _notifications = page.results;
+      _next = page.next;
       setState(() {});
     } catch (e) {
       ScaffoldMessenger.of(context).showSnackBar(
@@ -24,6 +28,28 @@ class _NotificationScreenState extends State<NotificationScreen> {
     }
   }
 
+  Future<void> _loadMoreNotifications() async {
+    if (_next == null || _isLoadingMore) return;
+    setState(() {
+      _isLoadingMore = true;
+    });
+    try {
+      final page = await ApiService().getNotifications(next: _next);
+      setState(() {
+        _notifications.addAll(page.results);
+        _next = page.next;
+        _isLoadingMore = false;
+      });
+    } catch (e) {
+      setState(() {
+        _isLoadingMore = false;
+      });
+      ScaffoldMessenger.of(context).showSnackBar(
+        SnackBar(content: Text('Error loading notifications: $e'), backgroundColor: Colors.red),
+      );
+    }
+  }
+
   Future<void> _loadUserId() async {
     final prefs = await SharedPreferences.getInstance();
     _userId = prefs.getString('user_id');
@@ -50,8 +76,16 @@ class _NotificationScreenState extends State<NotificationScreen> {
         child: _notifications.isEmpty
             ? Center(child: Text('No notifications yet'))
             : ListView.builder(
-          itemCount: _notifications.length,
+          itemCount: _notifications.length + (_next != null ? 1 : 0),
           itemBuilder: (context, index) {
+            if (index == _notifications.length) {
+              // Scrolled to the end: fetch the next page.
+              WidgetsBinding.instance.addPostFrameCallback((_) => _loadMoreNotifications());
+              return Padding(
+                padding: EdgeInsets.all(16),
+                child: Center(child: CircularProgressIndicator(color: Colors.purple[800])),
+              );
+            }
             final notif = _notifications[index];
             return Card(
               margin: EdgeInsets.symmetric(horizontal: 16, vertical: 4),  // Modern spacing
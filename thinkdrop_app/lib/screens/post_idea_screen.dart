@@ -110,6 +110,11 @@ class _IdeaPostScreenState extends State<IdeaPostScreen> {
     });
 
     try {
+      print('Sending files: ${_selectedFiles.map((f) => f.path.split('/').last).toList()}');
+      final uploads = <String>[];
+      for (var file in _selectedFiles) {
+        uploads.add(await ApiService().uploadFile(file));
+      }
       final response = await ApiService().makeAuthenticatedRequest<http.StreamedResponse>(
         request: (token) async {
           var request = http.MultipartRequest(
@@ -121,10 +126,7 @@ class _IdeaPostScreenState extends State<IdeaPostScreen> {
           request.fields['description'] = description;
           request.fields['visibility'] = _visibility;
           request.fields['categories'] = json.encode(_selectedCategories);
-          print('Sending files: ${_selectedFiles.map((f) => f.path.split('/').last).toList()}');
-          for (var file in _selectedFiles) {
-            request.files.add(await http.MultipartFile.fromPath('files', file.path));
-          }
+          request.fields['uploads'] = json.encode(uploads);
           return await request.send();
         },
       );
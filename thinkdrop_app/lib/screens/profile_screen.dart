@@ -29,9 +29,7 @@ class _ProfileScreenState extends State<ProfileScreen> with SingleTickerProvider
   List<dynamic> _publicIdeas = [];
   List<dynamic> _partialIdeas = [];
   List<dynamic> _privateIdeas = [];
-  int _publicPage = 1;
-  int _partialPage = 1;
-  int _privatePage = 1;
+  final Map<String, String?> _cursors = {};
   bool _publicHasMore = true;
   bool _partialHasMore = true;
   bool _privateHasMore = true;
@@ -243,9 +241,7 @@ class _ProfileScreenState extends State<ProfileScreen> with SingleTickerProvider
     }
     print('Loading ideas for userId: $_userId');
     setState(() {
-      _publicPage = 1;
-      _partialPage = 1;
-      _privatePage = 1;
+      _cursors.clear();
       _publicIdeas.clear();
       _partialIdeas.clear();
       _privateIdeas.clear();
@@ -285,8 +281,7 @@ class _ProfileScreenState extends State<ProfileScreen> with SingleTickerProvider
       if (visibility == 'PRIVATE') _privateIsLoadingMore = true;
     });
     try {
-      final page = visibility == 'PUBLIC' ? _publicPage : visibility == 'PARTIAL' ? _partialPage : _privatePage;
-      final url = '${ApiService.baseUrl}ideas/list/?user=$_userId&visibility=$visibility&page=$page';
+      final url = '${ApiService.baseUrl}ideas/list/?user=$_userId&visibility=$visibility${_cursors[visibility] != null ? '&cursor=${Uri.encodeQueryComponent(_cursors[visibility]!)}' : ''}';
       print('Fetching ideas: $url');
       final response = await ApiService().makeAuthenticatedRequest(
         request: (token) => http.get(
@@ -314,6 +309,7 @@ class _ProfileScreenState extends State<ProfileScreen> with SingleTickerProvider
           return bDate.compareTo(aDate);
         });
         setState(() {
+          _cursors[visibility] = data['next'] != null ? Uri.parse(data['next']).queryParameters['cursor'] : null;
           if (visibility == 'PUBLIC') {
             _publicIdeas = List.from(_publicIdeas)..addAll(newIdeas);
             _publicHasMore = data['next'] != null;
@@ -381,11 +377,6 @@ class _ProfileScreenState extends State<ProfileScreen> with SingleTickerProvider
 
   // Load more ideas for a specific visibility
   Future<void> _loadMoreIdeas(String visibility) async {
-    setState(() {
-      if (visibility == 'PUBLIC') _publicPage++;
-      if (visibility == 'PARTIAL') _partialPage++;
-      if (visibility == 'PRIVATE') _privatePage++;
-    });
     await _loadIdeasPage(visibility);
   }
 
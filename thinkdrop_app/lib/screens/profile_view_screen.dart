@@ -32,8 +32,7 @@ class _ProfileViewScreenState extends State<ProfileViewScreen> with SingleTicker
   int? _userId;
   List<dynamic> _publicIdeas = [];
   List<dynamic> _partialIdeas = [];
-  int _publicPage = 1;
-  int _partialPage = 1;
+  final Map<String, String?> _cursors = {};
   bool _publicHasMore = true;
   bool _partialHasMore = true;
   bool _publicIsLoadingMore = false;
@@ -151,9 +150,20 @@ class _ProfileViewScreenState extends State<ProfileViewScreen> with SingleTicker
     );
   }
 
-  // Load user profile from passed user object
+  // Show the compact user passed in, then fetch the full profile
   void _loadProfile() {
-    final user = widget.user;
+    _applyUser(widget.user);
+    _loadIdeas();
+    if (_userId != null) {
+      ApiService().getUser(_userId!).then((user) {
+        if (mounted) _applyUser(user);
+      }).catchError((e) {
+        print('Error loading full profile: $e');
+      });
+    }
+  }
+
+  void _applyUser(Map<String, dynamic> user) {
     print('Loading profile for user: ${user['username']}');
     setState(() {
       _firstName = user['first_name']?.toString() ?? '';
@@ -175,7 +185,6 @@ class _ProfileViewScreenState extends State<ProfileViewScreen> with SingleTicker
       print('Profile picture URL: $_profilePicUrl');
       print('Social links loaded: $_socialLinks');
     });
-    _loadIdeas();
   }
 
   // Load ideas for public and partial visibility
@@ -186,8 +195,7 @@ class _ProfileViewScreenState extends State<ProfileViewScreen> with SingleTicker
     }
     print('Loading ideas for userId: $_userId');
     setState(() {
-      _publicPage = 1;
-      _partialPage = 1;
+      _cursors.clear();
       _publicIdeas.clear();
       _partialIdeas.clear();
       _publicHasMore = true;
@@ -218,8 +226,7 @@ class _ProfileViewScreenState extends State<ProfileViewScreen> with SingleTicker
       if (visibility == 'PARTIAL') _partialIsLoadingMore = true;
     });
     try {
-      final page = visibility == 'PUBLIC' ? _publicPage : _partialPage;
-      final url = '${ApiService.baseUrl}ideas/list/?user=$_userId&visibility=$visibility&page=$page';
+      final url = '${ApiService.baseUrl}ideas/list/?user=$_userId&visibility=$visibility${_cursors[visibility] != null ? '&cursor=${Uri.encodeQueryComponent(_cursors[visibility]!)}' : ''}';
       print('Fetching ideas: $url');
       final response = await ApiService().makeAuthenticatedRequest(
         request: (token) => http.get(
@@ -247,6 +254,7 @@ class _ProfileViewScreenState extends State<ProfileViewScreen> with SingleTicker
           return bDate.compareTo(aDate);
         });
         setState(() {
+          _cursors[visibility] = data['next'] != null ? Uri.parse(data['next']).queryParameters['cursor'] : null;
           if (visibility == 'PUBLIC') {
             _publicIdeas = List.from(_publicIdeas)..addAll(newIdeas);
             _publicHasMore = data['next'] != null;
@@ -306,10 +314,6 @@ class _ProfileViewScreenState extends State<ProfileViewScreen> with SingleTicker
 
   // Load more ideas for a specific visibility
   Future<void> _loadMoreIdeas(String visibility) async {
-    setState(() {
-      if (visibility == 'PUBLIC') _publicPage++;
-      if (visibility == 'PARTIAL') _partialPage++;
-    });
     await _loadIdeasPage(visibility);
   }
 
@@ -18,7 +18,7 @@ class _SearchScreenState extends State<SearchScreen> {
   List<dynamic> _ideas = [];
   List<dynamic> _initialIdeas = [];
   String? _userId;
-  int _initialPage = 1;
+  String? _initialCursor;
   bool _initialHasMore = true;
   bool _initialIsLoadingMore = false;
   bool _isLoading = false;
@@ -69,7 +69,7 @@ class _SearchScreenState extends State<SearchScreen> {
       return;
     }
     setState(() {
-      _initialPage = 1;
+      _initialCursor = null;
       _initialIdeas.clear();
       _initialHasMore = true;
       _initialIsLoadingMore = false;
@@ -91,7 +91,7 @@ class _SearchScreenState extends State<SearchScreen> {
       _initialIsLoadingMore = true;
     });
     try {
-      final url = '${ApiService.baseUrl}ideas/list/?visibility=PUBLIC&page=$_initialPage';
+      final url = '${ApiService.baseUrl}ideas/list/?visibility=PUBLIC${_initialCursor != null ? '&cursor=${Uri.encodeQueryComponent(_initialCursor!)}' : ''}';
       print('Fetching initial ideas: $url');
       final response = await ApiService().makeAuthenticatedRequest(
         request: (token) => http.get(
@@ -126,6 +126,7 @@ class _SearchScreenState extends State<SearchScreen> {
           _initialIdeas.addAll(filteredIdeas);
           _initialIdeas.shuffle(Random()); // Randomize the ideas list
           _initialHasMore = data['next'] != null;
+          _initialCursor = _initialHasMore ? Uri.parse(data['next']).queryParameters['cursor'] : null;
           _initialIsLoadingMore = false;
           _isLoading = false;
           print('Added ${filteredIdeas.length} initial PUBLIC ideas, total: ${_initialIdeas.length}');
@@ -179,10 +180,7 @@ class _SearchScreenState extends State<SearchScreen> {
 
   // Load more initial public ideas
   Future<void> _loadMoreInitialIdeas() async {
-    setState(() {
-      _initialPage++;
-      print('Loading more initial ideas, page: $_initialPage');
-    });
+    print('Loading more initial ideas, cursor: $_initialCursor');
     await _loadInitialIdeasPage();
   }
 
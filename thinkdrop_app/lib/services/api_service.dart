@@ -25,6 +25,16 @@ class Comment {
     );
   }
 }
+// One page of a cursor-paginated list; pass [next] back to get the page after it.
+class Page<T> {
+  final List<T> results;
+  final String? next;
+
+  Page(this.results, this.next);
+
+  bool get hasMore => next != null;
+}
+
 class ApiService {
   static const String baseUrl = 'http://10.0.2.2:8000/api/';
 
@@ -189,6 +199,10 @@ class ApiService {
     required List<String> existingFiles,
   }) async {
     try {
+      final uploads = <String>[];
+      for (var file in files) {
+        uploads.add(await uploadFile(file));
+      }
       final response = await makeAuthenticatedRequest<http.StreamedResponse>(
         request: (token) async {
           var request = http.MultipartRequest(
@@ -201,9 +215,7 @@ class ApiService {
           request.fields['visibility'] = visibility;
           request.fields['categories'] = json.encode(categories);
           request.fields['existing_files'] = json.encode(existingFiles);
-          for (var file in files) {
-            request.files.add(await http.MultipartFile.fromPath('files', file.path));
-          }
+          request.fields['uploads'] = json.encode(uploads);
           return await request.send();
         },
       );
@@ -218,6 +230,66 @@ class ApiService {
     }
   }
 
+  // Sends a file in chunks to uploads/ and returns the upload id to attach
+  // to an idea. After a dropped connection the server's offset is fetched
+  // and the upload resumes from there instead of starting over.
+  Future<String> uploadFile(File file, {int chunkSize = 512 * 1024}) async {
+    final size = await file.length();
+    final created = await makeAuthenticatedRequest<http.Response>(
+      request: (token) => http.post(
+        Uri.parse('${baseUrl}uploads/'),
+        headers: {
+          'Authorization': 'Bearer $token',
+          'Content-Type': 'application/json',
+        },
+        body: json.encode({'filename': file.path.split('/').last, 'size': size}),
+      ),
+    );
+    if (created.statusCode != 201) {
+      throw Exception('Failed to start upload: ${created.body}');
+    }
+    final uploadId = json.decode(created.body)['id'] as String;
+    final uploadUrl = Uri.parse('${baseUrl}uploads/$uploadId/');
+    var offset = 0;
+    var failures = 0;
+    final raf = await file.open();
+    try {
+      while (offset < size) {
+        await raf.setPosition(offset);
+        final chunk = await raf.read(chunkSize);
+        final end = offset + chunk.length - 1;
+        try {
+          final response = await makeAuthenticatedRequest<http.Response>(
+            request: (token) => http.put(
+              uploadUrl,
+              headers: {
+                'Authorization': 'Bearer $token',
+                'Content-Type': 'application/octet-stream',
+                'Content-Range': 'bytes $offset-$end/$size',
+              },
+              body: chunk,
+            ),
+          );
+          if (response.statusCode == 200 || response.statusCode == 409) {
+            offset = json.decode(response.body)['received'] as int;
+            failures = 0;
+            continue;
+          }
+          throw Exception('Upload failed: ${response.body}');
+        } on SocketException {
+          if (++failures > 3) rethrow;
+          final status = await makeAuthenticatedRequest<http.Response>(
+            request: (token) => http.get(uploadUrl, headers: {'Authorization': 'Bearer $token'}),
+          );
+          offset = json.decode(status.body)['received'] as int;
+        }
+      }
+    } finally {
+      await raf.close();
+    }
+    return uploadId;
+  }
+
   Future<void> deleteIdea(String ideaId) async {
     try {
       final response = await makeAuthenticatedRequest<http.Response>(
@@ -312,7 +384,8 @@ class ApiService {
           headers: {'Authorization': 'Bearer $token'},
         ),
       );
-      if (response.statusCode != 204) {
+      // 202: the account is disabled and removed in the background.
+      if (response.statusCode != 202 && response.statusCode != 204) {
         throw Exception('Failed to delete account: ${response.body}');
       }
       await clearTokens();
@@ -322,6 +395,25 @@ class ApiService {
     }
   }
 
+  Future<Map<String, dynamic>> getUser(int userId) async {
+    try {
+      final response = await makeAuthenticatedRequest<http.Response>(
+        request: (token) => http.get(
+          Uri.parse('${baseUrl}users/$userId/'),
+          headers: {'Authorization': 'Bearer $token'},
+        ),
+      );
+      if (response.statusCode == 200) {
+        return json.decode(response.body);
+      } else {
+        throw Exception('Failed to load user: ${response.body}');
+      }
+    } catch (e) {
+      print('Error loading user: $e');
+      throw Exception('Error loading user: $e');
+    }
+  }
+
   Future<Map<String, dynamic>> search(String query) async {
     try {
       final response = await makeAuthenticatedRequest<http.Response>(
@@ -340,17 +432,18 @@ class ApiService {
       throw Exception('Error searching: $e');
     }
   }
-  Future<List<Comment>> getComments(int ideaId) async {
+  Future<Page<Comment>> getComments(int ideaId, {String? next}) async {
     try {
       final response = await makeAuthenticatedRequest<http.Response>(
         request: (token) => http.get(
-          Uri.parse('${baseUrl}ideas/$ideaId/comments/'),
+          Uri.parse(next ?? '${baseUrl}ideas/$ideaId/comments/'),
           headers: {'Authorization': 'Bearer $token'},
         ),
       );
       if (response.statusCode == 200) {
-        final List<dynamic> data = json.decode(response.body);
-        return data.map((json) => Comment.fromJson(json)).toList();
+        final data = json.decode(response.body);
+        final List<dynamic> results = data['results'];
+        return Page(results.map((json) => Comment.fromJson(json)).toList(), data['next']);
       } else {
         throw Exception('Failed to load comments: ${response.body}');
       }
@@ -437,16 +530,17 @@ class ApiService {
     }
   }
 
-  Future<List<dynamic>> getNotifications() async {
+  Future<Page<dynamic>> getNotifications({String? next}) async {
     try {
       final response = await makeAuthenticatedRequest<http.Response>(
         request: (token) => http.get(
-          Uri.parse('${baseUrl}notifications/'),
+          Uri.parse(next ?? '${baseUrl}notifications/'),
           headers: {'Authorization': 'Bearer $token'},
         ),
       );
       if (response.statusCode == 200) {
-        return json.decode(response.body);
+        final data = json.decode(response.body);
+        return Page(data['results'], data['next']);
       } else {
         throw Exception('Failed to load notifications: ${response.body}');
       }
@@ -473,16 +567,19 @@ class ApiService {
     }
   }
 
-  Future<List<dynamic>> getMessages(int ideaId) async {
+  // The first page holds the latest messages; [Page.next] leads to older
+  // ones. Each page comes oldest first, ready to render.
+  Future<Page<dynamic>> getMessages(int ideaId, {String? next}) async {
     try {
       final response = await makeAuthenticatedRequest<http.Response>(
         request: (token) => http.get(
-          Uri.parse('${baseUrl}ideas/$ideaId/messages/'),
+          Uri.parse(next ?? '${baseUrl}ideas/$ideaId/messages/'),
           headers: {'Authorization': 'Bearer $token'},
         ),
       );
       if (response.statusCode == 200) {
-        return json.decode(response.body);
+        final data = json.decode(response.body);
+        return Page(data['results'], data['next']);
       } else {
         throw Exception('Failed to load messages: ${response.body}');
       }
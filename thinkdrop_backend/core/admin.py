@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, Idea, Collaboration, Comment, Report, Category, IdeaCategory
+from .models import User, Idea, Collaboration, Comment, Report, Category, IdeaCategory, AccountDeletion
 
 # Define an inline for IdeaCategory
 class IdeaCategoryInline(admin.TabularInline):
@@ -17,4 +17,9 @@ admin.site.register(User)
 admin.site.register(Collaboration)
 admin.site.register(Comment)
 admin.site.register(Report)
-admin.site.register(Category)
\ No newline at end of file
+admin.site.register(Category)
+
+@admin.register(AccountDeletion)
+class AccountDeletionAdmin(admin.ModelAdmin):
+    list_display = ('user_id', 'status', 'step', 'requested_at', 'finished_at')
+    readonly_fields = ('user_id', 'status', 'step', 'progress', 'error', 'requested_at', 'updated_at', 'finished_at')
\ No newline at end of file
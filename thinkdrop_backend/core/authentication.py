@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User
+
+TOKEN_VERSION_CLAIM = 'ver'
+# Columns the request user carries without a query. Anything else is a
+# deferred field and loads from the database on first access.
+AUTH_FIELDS = ['id', 'username', 'is_active', 'interests', 'token_version']
+# Dropped on every save of the user and on revocation, but only in this
+# process's cache unless CACHES is shared. The timeout is how long another
+# worker can still accept a revoked token or a deactivated user, so it stays
+# well under ACCESS_TOKEN_LIFETIME.
+AUTH_RECORD_TIMEOUT = 60
+
+
+def auth_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def auth_record(user_id):
+    key = auth_cache_key(user_id)
+    record = cache.get(key)
+    if record is None:
+        record = User.objects.filter(pk=user_id).values(*AUTH_FIELDS).first()
+        if record is None:
+            return None
+        cache.set(key, record, AUTH_RECORD_TIMEOUT)
+    return record
+
+
+def forget_auth_record(user_id):
+    transaction.on_commit(lambda: cache.delete(auth_cache_key(user_id)))
+
+
+def issue_tokens(user):
+    refresh = RefreshToken.for_user(user)
+    refresh[TOKEN_VERSION_CLAIM] = user.token_version
+    return refresh
+
+
+def revoke_tokens(user):
+    # Every token issued so far carries the old version and stops working.
+    User.objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+    user.token_version = User.objects.filter(pk=user.pk).values_list('token_version', flat=True).get()
+    forget_auth_record(user.pk)
+
+
+def request_user(record):
+    # A User built from the cached record; other fields are deferred, so
+    # views that need them still get them, lazily.
+    names = [field.attname for field in User._meta.concrete_fields if field.attname in record]
+    return User.from_db('default', names, [record[name] for name in names])
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    # The signed token names the user; the row is not fetched. Revocation
+    # and deactivation are checked against the cached auth record.
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise AuthenticationFailed('Token contained no recognizable user identification', code='token_not_valid')
+        record = auth_record(user_id)
+        if record is None or not record['is_active']:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if validated_token.get(TOKEN_VERSION_CLAIM, 0) != record['token_version']:
+            raise AuthenticationFailed('Token has been revoked', code='token_not_valid')
+        return request_user(record)
@@ -2,12 +2,25 @@ from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
 
 class EmailBackend(ModelBackend):
+    # The only configured backend: the app signs in with an email, the admin
+    # with a username. Either way it is a single indexed lookup.
     def authenticate(self, request, username=None, password=None, **kwargs):
         UserModel = get_user_model()
-        try:
-            user = UserModel.objects.get(email=username)
-            if user.check_password(password):
-                return user
-        except UserModel.DoesNotExist:
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if not isinstance(username, str) or password is None:
             return None
-        return None
\ No newline at end of file
+        if '@' in username:
+            # Email is not unique in the table; the oldest account wins.
+            lookup = {'email__iexact': username}
+        else:
+            lookup = {UserModel.USERNAME_FIELD: username}
+        user = UserModel._default_manager.filter(**lookup).order_by('pk').first()
+        if user is None:
+            # Run the hasher anyway so unknown accounts are not told apart
+            # by response time.
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,84 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# Cached responses are keyed by the current version of every namespace they
+# read from. Change signals bump the version, which orphans the old entries at
+# once; the timeout only bounds how long an update missed by the signals (a
+# queryset .update(), another process without a shared cache) can be served.
+# Cached idea lists hold ids only and are rendered per request, so likes and
+# comments, which change far more often than anything else, do not bump IDEAS;
+# they bump COUNTERS, which only ETags over embedded ideas follow.
+IDEAS = 'ideas'
+USERS = 'users'
+CATEGORIES = 'categories'
+COLLABORATIONS = 'collaborations'
+TRENDING = 'trending'
+COUNTERS = 'counters'
+
+
+def response_cache():
+    return caches[settings.RESPONSE_CACHE.get('ALIAS', 'default')]
+
+
+def version_key(namespace):
+    return f'responses:version:{namespace}'
+
+
+def initial_version():
+    # A version lost to eviction restarts from the clock, never from a value
+    # that old entries may still be stored under.
+    return time.time_ns()
+
+
+def versions(namespaces):
+    cache = response_cache()
+    keys = [version_key(namespace) for namespace in namespaces]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, initial_version(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump(namespace):
+    cache = response_cache()
+    key = version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, initial_version(), None)
+
+
+def bump_on_commit(*namespaces):
+    def bump_all():
+        for namespace in namespaces:
+            bump(namespace)
+    transaction.on_commit(bump_all)
+
+
+def response_key(request, namespaces, per_user=True):
+    # The full path carries every parameter that shapes the body (cursor,
+    # page_size, fields, expand, sideload, image_size...); the host is part of
+    # the absolute media URLs.
+    parts = [request.get_host(), request.get_full_path()]
+    if per_user:
+        parts.append(str(request.user.pk))
+    digest = hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+    tags = '.'.join(f'{namespace}{version}' for namespace, version in zip(namespaces, versions(namespaces)))
+    return f'responses:{tags}:{digest}'
+
+
+def cached_data(request, namespaces, build, per_user=True):
+    # build() returns the data to cache; it only runs on a miss.
+    cache = response_cache()
+    key = response_key(request, namespaces, per_user)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, settings.RESPONSE_CACHE.get('TIMEOUT', 300))
+    return data
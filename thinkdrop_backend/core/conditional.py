@@ -0,0 +1,36 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from .caching import USERS, versions
+
+
+def collection_state(queryset, **extra):
+    # One aggregate over the filtered collection: newest row, highest id and
+    # row count catch appends and deletes; extra conditional counts (e.g.
+    # unread=Q(is_read=False)) catch in-place updates.
+    aggregates = {'latest': Max('created_at'), 'last_id': Max('id'), 'total': Count('id')}
+    aggregates.update({name: Count('id', filter=condition) for name, condition in extra.items()})
+    return queryset.order_by().aggregate(**aggregates)
+
+
+def collection_etag(request, state, namespaces):
+    # The path carries the cursor and ?fields=/?expand=; the cache namespace
+    # versions (core.caching) change when embedded authors or ideas do.
+    parts = [request.get_full_path(), *map(str, versions(namespaces))]
+    parts += [f'{name}={state[name]}' for name in sorted(state)]
+    return quote_etag(hashlib.sha1('\n'.join(parts).encode()).hexdigest())
+
+
+def conditional_get(request, queryset, build, namespaces=(USERS,), **extra):
+    # Answers If-None-Match with 304 before build() renders anything. Only the
+    # ETag is compared: deletes and read flags do not move Last-Modified.
+    state = collection_state(queryset, **extra)
+    etag = collection_etag(request, state, namespaces)
+    response = get_conditional_response(request, etag=etag) or build()
+    response['ETag'] = etag
+    if state['latest'] is not None:
+        response['Last-Modified'] = http_date(state['latest'].timestamp())
+    return response
@@ -0,0 +1,129 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.db.models import Prefetch
+
+from .groups import is_member, load_group, member_ids
+from .models import Message
+from .querysets import author_queryset
+from .notifications import unread_count
+from .realtime import message_group_name, notification_group_name
+from .serializers import MessageSerializer
+
+BACKLOG_LIMIT = 200
+
+
+def backlog(idea_id, last_id, limit=BACKLOG_LIMIT):
+    # The oldest `limit` messages after last_id, and whether more follow.
+    messages = list(
+        Message.objects.filter(idea_id=idea_id, id__gt=last_id).prefetch_related(
+            Prefetch('sender', queryset=author_queryset())
+        ).order_by('id')[:limit + 1]
+    )
+    return MessageSerializer(messages[:limit], many=True).data, len(messages) > limit
+
+
+class GroupChatConsumer(AsyncJsonWebsocketConsumer):
+    group_name = None
+
+    async def connect(self):
+        self.idea_id = self.scope['url_route']['kwargs']['idea_id']
+        user = self.scope['user']
+        if not user.is_authenticated or not await self.can_join(user):
+            await self.close(code=4403)
+            return
+        self.group_name = message_group_name(self.idea_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        # Replay what the client missed while disconnected. This runs after
+        # joining the group, so a message may arrive twice but never not at
+        # all; clients dedupe on id. The replay is capped: a client told
+        # has_more fetches the gap after last_id over the messages endpoint.
+        last_id = self.last_seen_id()
+        if last_id is not None:
+            messages, has_more = await database_sync_to_async(backlog)(self.idea_id, last_id)
+            for message in messages:
+                await self.send_json({'type': 'message', 'message': message})
+            await self.send_json({
+                'type': 'backlog',
+                'last_id': messages[-1]['id'] if messages else last_id,
+                'has_more': has_more,
+            })
+
+    async def disconnect(self, code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # Messages are posted over HTTP, which checks membership; the socket
+        # only pushes. A client that lost access is dropped here too.
+        await self.check_member()
+
+    async def chat_message(self, event):
+        # Membership can change while the socket is open: never forward to
+        # someone who was removed.
+        if await self.check_member():
+            await self.send_json({'type': 'message', 'message': event['message']})
+
+    async def group_changed(self, event):
+        # Sent when a collaboration changes; read past the cache, which may
+        # be another process's.
+        await self.check_member(fresh=True)
+
+    async def check_member(self, fresh=False):
+        if await self.still_member(fresh):
+            return True
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        self.group_name = None
+        await self.close(code=4403)
+        return False
+
+    def last_seen_id(self):
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        value = query.get('last_id', [''])[0]
+        return int(value) if value.isdigit() else None
+
+    @database_sync_to_async
+    def can_join(self, user):
+        return is_member(self.idea_id, user)
+
+    @database_sync_to_async
+    def still_member(self, fresh):
+        if not fresh:
+            return is_member(self.idea_id, self.scope['user'])
+        members = load_group(self.idea_id)
+        return members is not None and self.scope['user'].id in member_ids(members)
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    group_name = None
+
+    async def connect(self):
+        user = self.scope['user']
+        if not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.group_name = notification_group_name(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        count = await database_sync_to_async(unread_count)(user.id)
+        await self.send_json({'type': 'unread_count', 'unread_count': count})
+
+    async def disconnect(self, code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        pass
+
+    async def notification_created(self, event):
+        await self.send_json({
+            'type': 'notification',
+            'notification': event['notification'],
+            'unread_count': event['unread_count'],
+        })
+
+    async def notification_unread(self, event):
+        await self.send_json({'type': 'unread_count', 'unread_count': event['unread_count']})
@@ -0,0 +1,111 @@
+import logging
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .authentication import revoke_tokens
+from .images import delete_variants
+from .models import User, Idea, IdeaCategory, Like, Comment, Report, Message, Notification, Collaboration, UploadSession, AccountDeletion
+from .tasks import enqueue, handler
+from .uploads import discard_session
+
+logger = logging.getLogger(__name__)
+
+
+def deletion_steps(user_id):
+    # (name, queryset) in the order they are emptied. Rows hanging off the
+    # user's ideas go before the ideas, so deleting an idea never cascades
+    # into more than its own row.
+    owned = Idea.objects.filter(user_id=user_id).values('pk')
+    return [
+        ('likes', Like.objects.filter(Q(user_id=user_id) | Q(idea_id__in=owned))),
+        ('comments', Comment.objects.filter(Q(user_id=user_id) | Q(idea_id__in=owned))),
+        ('messages', Message.objects.filter(Q(sender_id=user_id) | Q(idea_id__in=owned))),
+        ('notifications', Notification.objects.filter(Q(user_id=user_id) | Q(sender_id=user_id) | Q(idea_id__in=owned))),
+        ('collaborations', Collaboration.objects.filter(Q(collaborator_id=user_id) | Q(idea_id__in=owned))),
+        ('reports', Report.objects.filter(Q(reporter_id=user_id) | Q(idea_id__in=owned))),
+        ('idea_categories', IdeaCategory.objects.filter(idea_id__in=owned)),
+        # Deleting an idea releases its attachments (signals.idea_deleted).
+        ('ideas', Idea.objects.filter(user_id=user_id)),
+    ]
+
+
+def request_deletion(user):
+    # Called from the request: the account stops working at once, the rows
+    # go in the background.
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        revoke_tokens(user)
+        deletion, _ = AccountDeletion.objects.get_or_create(user_id=user.pk)
+        transaction.on_commit(lambda: enqueue('account_deletion', {'deletion_id': deletion.pk}))
+    return deletion
+
+
+def delete_batch(queryset, batch_size):
+    # One short transaction per batch, so locks are held for one batch only.
+    # Deleting through the queryset fires the usual signals (counters, change
+    # log, caches).
+    with transaction.atomic():
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if ids:
+            queryset.model.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def save_progress(deletion, **fields):
+    for name, value in fields.items():
+        setattr(deletion, name, value)
+    deletion.save(update_fields=[*fields, 'updated_at'])
+
+
+def delete_media(user):
+    name = user.profile_pic.name
+    variants = user.profile_pic_variants
+
+    def delete_files():
+        if name:
+            default_storage.delete(name)
+        delete_variants(variants)
+    transaction.on_commit(delete_files)
+
+
+def run_deletion(deletion, batch_size=None):
+    # Safe to run again after a crash: every step just empties what is left.
+    batch_size = batch_size or settings.ACCOUNT_DELETION.get('BATCH_SIZE', 500)
+    save_progress(deletion, status='running', error='')
+    progress = dict(deletion.progress)
+    for step, queryset in deletion_steps(deletion.user_id):
+        save_progress(deletion, step=step)
+        while True:
+            deleted = delete_batch(queryset, batch_size)
+            if not deleted:
+                break
+            progress[step] = progress.get(step, 0) + deleted
+            save_progress(deletion, progress=progress)
+
+    save_progress(deletion, step='account')
+    with transaction.atomic():
+        user = User.objects.filter(pk=deletion.user_id).only('id', 'profile_pic', 'profile_pic_variants').first()
+        if user is not None:
+            # Partial uploads live outside the storage backend.
+            for session in UploadSession.objects.filter(user_id=user.pk):
+                discard_session(session)
+            delete_media(user)
+            user.delete()
+    save_progress(deletion, status='done', step='', finished_at=timezone.now())
+
+
+@handler('account_deletion')
+def process_deletions(jobs):
+    for job in jobs:
+        deletion = AccountDeletion.objects.filter(pk=job['deletion_id']).exclude(status='done').first()
+        if deletion is None:
+            continue
+        try:
+            run_deletion(deletion)
+        except Exception as error:
+            logger.exception("Account deletion %s failed", deletion.pk)
+            save_progress(deletion, status='failed', error=str(error))
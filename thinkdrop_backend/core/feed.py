@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Count, DateTimeField, DurationField, ExpressionWrapper, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Idea, IdeaCategory
+
+# Every category an idea shares with the reader's interests ranks it as if it
+# had been posted this much later, so relevant ideas float up without burying
+# everything new.
+INTEREST_BOOST = timedelta(hours=48)
+
+
+def interest_overlap(interests):
+    matches = (
+        IdeaCategory.objects
+        .filter(idea=OuterRef('pk'), category__name__in=interests)
+        .order_by()
+        .values('idea')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(matches, output_field=IntegerField()), Value(0))
+
+
+def candidate_window(ideas, interests, before=None, count=None):
+    # ranked_at lies between created_at and created_at + max_boost, so the
+    # next `count` ideas ranked below `before` are all created within
+    # [c - max_boost, before], where c is the created_at of the count-th
+    # newest idea that cannot rank above `before`. Bounding created_at lets
+    # the interest subquery run on that window instead of every public idea.
+    # c is a scalar subquery of the feed query itself, so the window costs no
+    # extra round trip; with fewer than `count` such ideas nothing is cut.
+    max_boost = INTEREST_BOOST * len(set(interests))
+    older = ideas if before is None else ideas.filter(created_at__lt=before - max_boost)
+    nth = Subquery(older.order_by('-created_at', '-id').values('created_at')[count - 1:count])
+    if before is not None:
+        ideas = ideas.filter(created_at__lte=before)
+    return ideas.filter(created_at__gte=Coalesce(
+        ExpressionWrapper(nth - Value(max_boost), output_field=DateTimeField()),
+        Value(datetime.min.replace(tzinfo=timezone.utc)),
+    ))
+
+
+def rank_ideas(queryset, interests=None):
+    if not interests:
+        return queryset.annotate(ranked_at=F('created_at')).order_by('-ranked_at', '-id')
+    boost = ExpressionWrapper(F('interest_overlap') * Value(INTEREST_BOOST), output_field=DurationField())
+    return queryset.annotate(interest_overlap=interest_overlap(interests)).annotate(
+        ranked_at=ExpressionWrapper(F('created_at') + boost, output_field=DateTimeField())
+    ).order_by('-ranked_at', '-id')
+
+
+def feed_queryset(user, user_filter=None, visibility=None, before=None, count=None):
+    # before/count: the page's cursor ranked_at and how many rows it reads.
+    # Given a count, a ranked feed only looks at the window that can fill it.
+    if user_filter and user_filter.isdigit():
+        ideas = Idea.objects.filter(user_id=int(user_filter))
+        interests = None
+    else:
+        ideas = Idea.objects.filter(visibility__in=['public', 'partial'])
+        interests = user.interests
+    if visibility:
+        ideas = ideas.filter(visibility=visibility.lower())
+    if interests and count:
+        ideas = candidate_window(ideas, interests, before, count)
+    return rank_ideas(ideas, interests)
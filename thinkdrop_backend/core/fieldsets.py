@@ -0,0 +1,60 @@
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def param_set(request, name):
+    value = request.query_params.get(name) if request is not None else None
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def fieldset_context(request):
+    # ?fields=a,b keeps only those top-level fields (id is always kept);
+    # ?expand=x,y renders only those relations nested, the rest as ids.
+    # Either left out means everything, as before.
+    return {
+        FIELDS_PARAM: param_set(request, FIELDS_PARAM),
+        EXPAND_PARAM: param_set(request, EXPAND_PARAM),
+    }
+
+
+def includes(context, name):
+    fields = (context or {}).get(FIELDS_PARAM)
+    return fields is None or name == 'id' or name in fields
+
+
+def expands(context, name):
+    if not includes(context, name):
+        return False
+    expand = (context or {}).get(EXPAND_PARAM)
+    return expand is None or name in expand
+
+
+class SparseFieldsMixin:
+    # Trims the field set before rendering, so a left-out method field is
+    # never called and querysets can skip the lookups behind it. Only the
+    # top-level serializer of a response is trimmed; writes never are.
+    expandable_fields = ()
+    # Field name -> name it is rendered under, where to_representation renames.
+    field_aliases = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if hasattr(self, 'initial_data') or not self.is_response_root():
+            return fields
+        for name in list(fields):
+            public_name = self.field_aliases.get(name, name)
+            if not includes(self.context, public_name):
+                del fields[name]
+            elif name in self.expandable_fields and not expands(self.context, public_name):
+                fields[name] = serializers.PrimaryKeyRelatedField(source=fields[name].source, read_only=True)
+        return fields
+
+    def is_response_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
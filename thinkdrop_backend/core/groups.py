@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Idea, Collaboration
+
+# Collaboration and idea signals drop the entry as soon as membership
+# changes; the timeout only bounds a change made behind their back.
+GROUP_TIMEOUT = 60 * 60
+
+
+def group_cache_key(idea_id):
+    return f'groups:members:{idea_id}'
+
+
+def load_group(idea_id):
+    owner = Idea.objects.filter(pk=idea_id).values_list('user_id', 'user__username').first()
+    if owner is None:
+        return None
+    collaborators = Collaboration.objects.filter(idea_id=idea_id, status='accepted').values_list(
+        'collaborator_id', 'collaborator__username'
+    )
+    return {
+        'owner': {'id': owner[0], 'username': owner[1]},
+        'collaborators': [{'id': user_id, 'username': username} for user_id, username in collaborators],
+    }
+
+
+def group(idea_id):
+    # Owner and accepted collaborators of an idea, or None if it does not
+    # exist. Cached, so polling the group costs no queries after the first.
+    key = group_cache_key(idea_id)
+    members = cache.get(key)
+    if members is None:
+        members = load_group(idea_id)
+        if members is not None:
+            cache.set(key, members, GROUP_TIMEOUT)
+    return members
+
+
+def member_ids(members):
+    return {members['owner']['id'], *(member['id'] for member in members['collaborators'])}
+
+
+def is_member(idea_id, user):
+    # Owner or accepted collaborator
+    members = group(idea_id)
+    return members is not None and user.id in member_ids(members)
+
+
+def invalidate_group(idea_id):
+    transaction.on_commit(lambda: cache.delete(group_cache_key(idea_id)))
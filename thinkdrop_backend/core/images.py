@@ -0,0 +1,114 @@
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+from .models import User, StoredFile
+from .tasks import enqueue, handler
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels for each variant.
+VARIANT_SIZES = {
+    'small': 96,
+    'medium': 320,
+    'large': 1080,
+}
+IMAGE_SIZE_PARAM = 'image_size'
+
+if features.check('webp'):
+    VARIANT_FORMAT, VARIANT_EXTENSION = 'WEBP', '.webp'
+else:
+    VARIANT_FORMAT, VARIANT_EXTENSION = 'JPEG', '.jpg'
+
+
+def variant_key(name, size):
+    return f'{os.path.splitext(name)[0]}_{size}{VARIANT_EXTENSION}'
+
+
+def make_variants(name):
+    # Writes each size next to the original and returns {size: key}.
+    with default_storage.open(name, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    image = image.convert('RGBA' if VARIANT_FORMAT == 'WEBP' and image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    variants = {}
+    for size, edge in VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, VARIANT_FORMAT, quality=80)
+        key = variant_key(name, size)
+        if default_storage.exists(key):
+            default_storage.delete(key)
+        variants[size] = default_storage.save(key, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def delete_variants(variants):
+    for key in (variants or {}).values():
+        default_storage.delete(key)
+
+
+def queue_profile_pic_variants(user):
+    if user.profile_pic:
+        payload = {'kind': 'profile_pic', 'user_id': user.id, 'name': user.profile_pic.name}
+        transaction.on_commit(lambda: enqueue('image_variants', payload))
+
+
+def queue_file_variants(key):
+    payload = {'kind': 'file', 'key': key}
+    transaction.on_commit(lambda: enqueue('image_variants', payload))
+
+
+@handler('image_variants')
+def build_variants(jobs):
+    for job in jobs:
+        try:
+            if job['kind'] == 'profile_pic':
+                build_profile_pic_variants(job['user_id'], job['name'])
+            else:
+                build_file_variants(job['key'])
+        except Exception:
+            logger.exception("Could not build image variants for %r", job)
+
+
+def build_profile_pic_variants(user_id, name):
+    user = User.objects.filter(pk=user_id).only('id', 'profile_pic', 'profile_pic_variants').first()
+    if user is None or user.profile_pic.name != name:
+        return
+    old_variants = user.profile_pic_variants
+    variants = make_variants(name)
+    # Skip the write if the picture changed while we were resizing.
+    if User.objects.filter(pk=user_id, profile_pic=name).update(profile_pic_variants=variants):
+        delete_variants({size: key for size, key in (old_variants or {}).items() if key not in variants.values()})
+    else:
+        delete_variants(variants)
+
+
+def build_file_variants(key):
+    stored = StoredFile.objects.filter(key=key).first()
+    if stored is None or stored.variants:
+        return
+    variants = make_variants(key)
+    if not StoredFile.objects.filter(pk=stored.pk).update(variants=variants):
+        delete_variants(variants)
+
+
+def requested_size(context):
+    # ?image_size= wins over the view's default hint in the serializer context.
+    request = context.get('request')
+    size = request.query_params.get(IMAGE_SIZE_PARAM) if request is not None and hasattr(request, 'query_params') else None
+    size = size or context.get(IMAGE_SIZE_PARAM)
+    return size if size in VARIANT_SIZES else None
+
+
+def pick_variant(name, variants, context, default=None):
+    size = requested_size(context) or default
+    if size and variants and size in variants:
+        return variants[size]
+    return name
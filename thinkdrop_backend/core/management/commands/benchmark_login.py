@@ -0,0 +1,31 @@
+import timeit
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import check_password, get_hasher, make_password
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Measure login throughput under the configured password hasher, to size auth workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--number', type=int, default=10)
+        # An existing account to time the whole authenticate() call with,
+        # user lookup included.
+        parser.add_argument('--email')
+        parser.add_argument('--password')
+
+    def handle(self, *args, **options):
+        hasher = get_hasher()
+        encoded = make_password('benchmark-password')
+        runs = [('hasher', lambda: check_password('benchmark-password', encoded))]
+        if options['email'] and options['password']:
+            runs.append(('login', lambda: authenticate(username=options['email'], password=options['password'])))
+            runs.append(('unknown', lambda: authenticate(username='nobody@invalid', password=options['password'])))
+
+        self.stdout.write(f"hasher: {hasher.algorithm} ({settings.PASSWORD_HASHERS[0]})")
+        for label, run in runs:
+            best = min(timeit.repeat(run, number=options['number'], repeat=options['repeat'])) / options['number']
+            self.stdout.write(f"{label:>8}: {best * 1e3:.1f} ms/attempt, {1 / best:.1f} attempts/s per core")
@@ -0,0 +1,58 @@
+import timeit
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework import serializers
+
+from core.serializers import TimeSinceField
+
+
+def reparse_time_since(data, today):
+    # What IdeaListView and SearchView used to do with each rendered idea.
+    created_at = data['created_at']
+    time_diff = today - timezone.datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+    days = time_diff.days
+    total_seconds = time_diff.total_seconds()
+    hours = int(total_seconds // 3600)
+    minutes = int((total_seconds % 3600) // 60)
+    seconds = int(total_seconds % 60)
+    if days > 0:
+        data['time_since'] = f"{days}d"
+    elif hours > 0:
+        data['time_since'] = f"{hours}h"
+    elif minutes > 0:
+        data['time_since'] = f"{minutes}m"
+    else:
+        data['time_since'] = f"{seconds}s"
+
+
+class Command(BaseCommand):
+    help = "Compare the per-item cost of time_since: re-parsing serialized created_at versus TimeSinceField."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        stamps = [now - timedelta(minutes=7 * i) for i in range(options['items'])]
+        created_at = serializers.DateTimeField()
+        time_since = TimeSinceField()
+        time_since.bind('time_since', serializers.Serializer(context={}))
+
+        def before():
+            today = timezone.now()
+            for stamp in stamps:
+                reparse_time_since({'created_at': created_at.to_representation(stamp)}, today)
+
+        # Both sides render created_at, as the response carries it either way.
+        def after():
+            time_since.context.pop('now', None)
+            for stamp in stamps:
+                created_at.to_representation(stamp)
+                time_since.to_representation(stamp)
+
+        for label, run in (('re-parse', before), ('field', after)):
+            best = min(timeit.repeat(run, number=1, repeat=options['repeat']))
+            self.stdout.write(f"{label:>9}: {best / len(stamps) * 1e6:.2f} us/item")
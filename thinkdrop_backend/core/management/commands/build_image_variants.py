@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.images import build_variants
+from core.models import User, StoredFile
+
+
+class Command(BaseCommand):
+    help = "Generate resized variants for profile pictures and image attachments that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        users = User.objects.exclude(profile_pic='').exclude(profile_pic__isnull=True).filter(profile_pic_variants={})
+        files = StoredFile.objects.filter(content_type__startswith='image/', variants={})
+        jobs = [
+            {'kind': 'profile_pic', 'user_id': user_id, 'name': name}
+            for user_id, name in users.values_list('id', 'profile_pic').iterator()
+        ] + [
+            {'kind': 'file', 'key': key}
+            for key in files.values_list('key', flat=True).iterator()
+        ]
+        for start in range(0, len(jobs), options['batch_size']):
+            build_variants(jobs[start:start + options['batch_size']])
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(jobs)} image(s)."))
@@ -0,0 +1,25 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.models import StoredFile
+
+
+class Command(BaseCommand):
+    help = "Delete the original uploads that migration 0015 copied to content keys. Once run, migrating back to 0014 points ideas at the copies instead."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        deleted = 0
+        for stored in StoredFile.objects.exclude(legacy_keys=[]).only('id', 'key', 'legacy_keys').iterator():
+            for old_key in stored.legacy_keys:
+                if old_key == stored.key or not default_storage.exists(old_key):
+                    continue
+                if not options['dry_run']:
+                    default_storage.delete(old_key)
+                deleted += 1
+            if not options['dry_run']:
+                StoredFile.objects.filter(pk=stored.pk).update(legacy_keys=[])
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} original upload(s)."))
@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.uploads import expire_sessions
+
+
+class Command(BaseCommand):
+    help = "Delete upload sessions that were abandoned, with their partial files. Meant to run on a schedule."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=settings.UPLOAD_SESSION_EXPIRY_HOURS)
+
+    def handle(self, *args, **options):
+        expired = expire_sessions(timezone.now() - timedelta(hours=options['hours']))
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} upload session(s)."))
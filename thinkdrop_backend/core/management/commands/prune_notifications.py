@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.notifications import compact, purge_read
+
+
+class Command(BaseCommand):
+    help = "Fold old like/comment notifications into one per idea and delete old read notifications. Meant to run on a schedule."
+
+    def add_arguments(self, parser):
+        retention = settings.NOTIFICATION_RETENTION
+        parser.add_argument('--compact-after-days', type=int, default=retention['COMPACT_AFTER_DAYS'])
+        parser.add_argument('--delete-read-after-days', type=int, default=retention['DELETE_READ_AFTER_DAYS'])
+        parser.add_argument('--batch-size', type=int, default=retention['BATCH_SIZE'])
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        folded = compact(now - timedelta(days=options['compact_after_days']))
+        self.stdout.write(f"Folded {folded} notification(s).")
+        deleted = purge_read(now - timedelta(days=options['delete_read_after_days']), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} read notification(s)."))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from core.models import Idea, Like, Comment
+from core.querysets import count_of
+
+
+class Command(BaseCommand):
+    help = "Check Idea.like_count and Idea.comment_count against the likes and comments tables and repair drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drifted ideas without fixing them.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        drifted = Idea.objects.annotate(
+            actual_likes=count_of(Like, 'idea'),
+            actual_comments=count_of(Comment, 'idea'),
+        ).filter(
+            ~Q(like_count=F('actual_likes')) | ~Q(comment_count=F('actual_comments'))
+        ).values_list('pk', 'like_count', 'actual_likes', 'comment_count', 'actual_comments')
+
+        fixed = 0
+        batch = []
+        for row in drifted.iterator(chunk_size=options['batch_size']):
+            idea_id, like_count, actual_likes, comment_count, actual_comments = row
+            self.stdout.write(
+                f"Idea {idea_id}: likes {like_count} -> {actual_likes}, comments {comment_count} -> {actual_comments}"
+            )
+            batch.append(idea_id)
+            if len(batch) >= options['batch_size']:
+                fixed += self.repair(batch, options['dry_run'])
+                batch = []
+        if batch:
+            fixed += self.repair(batch, options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(f"{fixed} idea(s) have drifted counters.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Repaired counters on {fixed} idea(s)."))
+
+    def repair(self, idea_ids, dry_run):
+        if dry_run:
+            return len(idea_ids)
+        # Recount inside the UPDATE itself so likes or comments written since the
+        # drift scan are not lost.
+        with transaction.atomic():
+            return Idea.objects.filter(pk__in=idea_ids).update(
+                like_count=count_of(Like, 'idea'),
+                comment_count=count_of(Comment, 'idea'),
+            )
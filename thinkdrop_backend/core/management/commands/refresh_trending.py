@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.trending import refresh_trending
+
+
+class Command(BaseCommand):
+    help = "Recompute trending scores from recent likes and comments. Meant to run on a schedule."
+
+    def handle(self, *args, **options):
+        refreshed, dropped = refresh_trending()
+        self.stdout.write(self.style.SUCCESS(f"Scored {refreshed} trending idea(s), dropped {dropped}."))
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.deletion import run_deletion
+from core.models import AccountDeletion
+
+
+class Command(BaseCommand):
+    help = "Finish account deletions that are pending, were interrupted or failed. The in-process task queue does not survive a restart."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.ACCOUNT_DELETION.get('BATCH_SIZE', 500))
+
+    def handle(self, *args, **options):
+        for deletion in AccountDeletion.objects.exclude(status='done').order_by('pk'):
+            self.stdout.write(f"Deleting user {deletion.user_id}...")
+            run_deletion(deletion, options['batch_size'])
+            total = sum(deletion.progress.values())
+            self.stdout.write(self.style.SUCCESS(f"User {deletion.user_id} deleted ({total} row(s))."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.uploads import sweep_stored_files
+
+
+class Command(BaseCommand):
+    help = "Delete stored files nothing references: unreferenced rows and blobs left without a row. Meant to run on a schedule."
+
+    def handle(self, *args, **options):
+        rows, blobs = sweep_stored_files()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {rows} unreferenced file(s) and {blobs} orphaned blob(s)."))
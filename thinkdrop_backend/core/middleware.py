@@ -0,0 +1,40 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .authentication import StatelessJWTAuthentication
+
+
+@database_sync_to_async
+def user_for_token(raw_token):
+    authentication = StatelessJWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    # Websocket clients cannot always set headers, so the access token may
+    # come either as "Authorization: Bearer <token>" or as ?token=<token>.
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        raw_token = self.token_from_headers(scope) or self.token_from_query(scope)
+        scope['user'] = await user_for_token(raw_token) if raw_token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
+
+    def token_from_headers(self, scope):
+        for name, value in scope.get('headers', []):
+            if name == b'authorization':
+                parts = value.split()
+                if len(parts) == 2 and parts[0] == b'Bearer':
+                    return parts[1]
+        return None
+
+    def token_from_query(self, scope):
+        query = parse_qs(scope.get('query_string', b'').decode())
+        return query.get('token', [None])[0]
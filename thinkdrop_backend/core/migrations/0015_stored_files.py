@@ -0,0 +1,97 @@
+# Generated by Django 5.2.5 on 2026-10-17 16:01
+
+import hashlib
+import mimetypes
+import os
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+from django.db.models import F
+
+
+def url_to_key(value):
+    path = urlparse(value).path
+    media_path = urlparse(settings.MEDIA_URL).path
+    if path.startswith(media_path):
+        return path[len(media_path):]
+    return value.lstrip('/')
+
+
+def move_to_content_keys(apps, schema_editor):
+    # Rewrites Idea.files from absolute URLs to content-addressed keys,
+    # copying each distinct file once and counting references per idea.
+    # Originals are only copied, never deleted here: each row remembers them
+    # in legacy_keys until delete_legacy_uploads removes them.
+    Idea = apps.get_model('core', 'Idea')
+    StoredFile = apps.get_model('core', 'StoredFile')
+    moved = {}
+    for idea in Idea.objects.exclude(files=[]).only('id', 'files').iterator():
+        keys = []
+        for old_key in map(url_to_key, idea.files):
+            if old_key not in moved:
+                moved[old_key] = old_key
+                if default_storage.exists(old_key):
+                    hasher = hashlib.sha256()
+                    with default_storage.open(old_key, 'rb') as source:
+                        for chunk in source.chunks():
+                            hasher.update(chunk)
+                    sha256 = hasher.hexdigest()
+                    ext = os.path.splitext(old_key)[1].lower()
+                    key = f'idea_files/{sha256[:2]}/{sha256}{ext}'
+                    if not default_storage.exists(key):
+                        with default_storage.open(old_key, 'rb') as source:
+                            default_storage.save(key, source)
+                    stored, _ = StoredFile.objects.get_or_create(key=key, defaults={
+                        'sha256': sha256,
+                        'size': default_storage.size(key),
+                        'content_type': mimetypes.guess_type(key)[0] or '',
+                    })
+                    if old_key not in stored.legacy_keys:
+                        stored.legacy_keys.append(old_key)
+                        stored.save(update_fields=['legacy_keys'])
+                    moved[old_key] = key
+            if moved[old_key] not in keys:
+                keys.append(moved[old_key])
+        StoredFile.objects.filter(key__in=keys).update(ref_count=F('ref_count') + 1)
+        Idea.objects.filter(pk=idea.pk).update(files=keys)
+
+
+def restore_legacy_urls(apps, schema_editor):
+    # Points Idea.files back at media URLs: the original upload while it is
+    # still kept, else the content-keyed copy, which holds the same bytes.
+    # Ideas that shared one content get the same original back.
+    Idea = apps.get_model('core', 'Idea')
+    StoredFile = apps.get_model('core', 'StoredFile')
+    originals = {}
+    for key, legacy_keys in StoredFile.objects.values_list('key', 'legacy_keys'):
+        kept = [old_key for old_key in legacy_keys if default_storage.exists(old_key)]
+        originals[key] = kept[0] if kept else key
+    for idea in Idea.objects.exclude(files=[]).only('id', 'files').iterator():
+        files = [default_storage.url(originals.get(key, key)) for key in idea.files]
+        Idea.objects.filter(pk=idea.pk).update(files=files)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(max_length=64)),
+                ('size', models.PositiveBigIntegerField()),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('ref_count', models.IntegerField(default=0)),
+                ('legacy_keys', models.JSONField(blank=True, default=list, editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(move_to_content_keys, restore_legacy_urls),
+    ]
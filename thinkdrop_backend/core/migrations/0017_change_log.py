@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-17 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('collection', models.CharField(choices=[('ideas', 'Ideas'), ('likes', 'Likes'), ('comments', 'Comments'), ('messages', 'Messages'), ('notifications', 'Notifications'), ('collaborations', 'Collaborations')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('idea_id', models.BigIntegerField(blank=True, null=True)),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['collection', 'id'], name='core_change_collection'),
+                    models.Index(fields=['collection', 'user_id', 'id'], name='core_change_user'),
+                    models.Index(fields=['collection', 'idea_id', 'id'], name='core_change_idea'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-17 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_notification_retention'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['visibility', '-created_at', '-id'], name='core_idea_visibility_created'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='core_idea_user_created'),
+        ),
+        migrations.AddIndex(
+            model_name='collaboration',
+            index=models.Index(fields=['idea', 'status'], name='core_collab_idea_status'),
+        ),
+        migrations.AddIndex(
+            model_name='collaboration',
+            index=models.Index(fields=['collaborator', 'status'], name='core_collab_user_status'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['idea', '-created_at', '-id'], name='core_comment_idea_created'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['idea', '-created_at', '-id'], name='core_message_idea_created'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_account_deletion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created_at'], name='core_comment_created'),
+        ),
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(fields=['created_at'], name='core_like_created'),
+        ),
+        migrations.CreateModel(
+            name='TrendingIdea',
+            fields=[
+                ('idea', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='core.idea')),
+                ('score', models.FloatField()),
+                ('recent_likes', models.PositiveIntegerField(default=0)),
+                ('recent_comments', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score', '-idea'], name='core_trending_score')],
+            },
+        ),
+    ]
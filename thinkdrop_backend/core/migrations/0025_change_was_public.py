@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_uploadsession_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='change',
+            name='was_public',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_change_was_public'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(visibility__in=['public', 'partial']),
+                name='core_idea_shared_created',
+            ),
+        ),
+    ]
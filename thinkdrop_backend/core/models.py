@@ -1,6 +1,11 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
+from django.db.models.functions import Upper
 
 def validate_social_links(value):
     if not isinstance(value, list):
@@ -24,6 +29,18 @@ class User(AbstractUser):
     interests = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     profile_pic = models.ImageField(upload_to='profile_pics/', null=True, blank=True)
+    # Resized copies keyed by size name, filled in by the image_variants task.
+    profile_pic_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Carried in issued JWTs; bumping it revokes every token issued before.
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            GinIndex(fields=['username'], opclasses=['gin_trgm_ops'], name='core_user_username_trgm'),
+            GinIndex(fields=['email'], opclasses=['gin_trgm_ops'], name='core_user_email_trgm'),
+            # Serves email__iexact, which compiles to UPPER(email::text) = UPPER(%s).
+            models.Index(Upper('email'), name='core_user_email_upper'),
+        ]
 
     def __str__(self):
         return self.username
@@ -40,19 +57,32 @@ class Idea(models.Model):
     visibility = models.CharField(max_length=10, choices=VISIBILITY_CHOICES, default='private')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ideas')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Storage keys of StoredFile rows, not URLs.
     files = models.JSONField(default=list, blank=True)
+    like_count = models.IntegerField(default=0)
+    comment_count = models.IntegerField(default=0)
+    # Maintained by a database trigger on title/short_description/description.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='core_idea_search_vector'),
+            # Feed pages (public/partial, newest first) and per-user idea lists,
+            # both keyset-paginated on (created_at, id).
+            models.Index(fields=['visibility', '-created_at', '-id'], name='core_idea_visibility_created'),
+            models.Index(fields=['user', '-created_at', '-id'], name='core_idea_user_created'),
+            # The same order over public and partial together, which a
+            # visibility IN (...) scan of the index above cannot give.
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(visibility__in=['public', 'partial']),
+                name='core_idea_shared_created',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
-    @property
-    def like_count(self):
-        return self.likes.count()
-    
-    @property
-    def comment_count(self):
-        return self.comments.count()
-
 class Collaboration(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -65,6 +95,10 @@ class Collaboration(models.Model):
 
     class Meta:
         unique_together = ('idea', 'collaborator')
+        indexes = [
+            models.Index(fields=['idea', 'status'], name='core_collab_idea_status'),
+            models.Index(fields=['collaborator', 'status'], name='core_collab_user_status'),
+        ]
 
     def __str__(self):
         return f"{self.collaborator} on {self.idea}"
@@ -75,6 +109,13 @@ class Comment(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['idea', '-created_at', '-id'], name='core_comment_idea_created'),
+            # The trending refresh reads the recent window (core.trending).
+            models.Index(fields=['created_at'], name='core_comment_created'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.user} on {self.idea}"
 
@@ -91,6 +132,11 @@ class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='core_category_name_trgm'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -111,6 +157,9 @@ class Like(models.Model):
 
     class Meta:
         unique_together = ('user', 'idea')
+        indexes = [
+            models.Index(fields=['created_at'], name='core_like_created'),
+        ]
 
     def __str__(self):
         return f"{self.user} likes {self.idea}"
@@ -130,6 +179,16 @@ class Notification(models.Model):
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # How many like/comment notifications were folded into this one.
+    actor_count = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # Inbox pages (keyset on created_at, id) and the unread count / bulk
+            # read queries.
+            models.Index(fields=['user', '-created_at', '-id'], name='core_notif_user_created'),
+            models.Index(fields=['user', 'is_read'], name='core_notif_user_read'),
+        ]
 
     def __str__(self):
         return f"{self.type} for {self.user} on {self.idea}"
@@ -140,5 +199,124 @@ class Message(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['idea', '-created_at', '-id'], name='core_message_idea_created'),
+        ]
+
+    def __str__(self):
+        return f"Message by {self.sender} on {self.idea}"
+
+class StoredFile(models.Model):
+    # One row per distinct file content; key is derived from the sha256, so
+    # identical attachments share a single object in storage.
+    key = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=100, blank=True)
+    ref_count = models.IntegerField(default=0)
+    # Original upload paths this content was copied from by migration 0015,
+    # kept until delete_legacy_uploads has run.
+    legacy_keys = models.JSONField(default=list, blank=True, editable=False)
+    variants = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.key
+
+
+class UploadSession(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('complete', 'Complete'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    content_type = models.CharField(max_length=100, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Last chunk written; expire_upload_sessions drops sessions idle too long.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.filename} by {self.user}"
+
+
+class Change(models.Model):
+    # Append-only log read by the sync endpoint. Ids are the watermarks.
+    # idea_id and user_id are plain columns, not foreign keys, so tombstones
+    # outlive the rows they describe.
+    COLLECTION_CHOICES = [
+        ('ideas', 'Ideas'),
+        ('likes', 'Likes'),
+        ('comments', 'Comments'),
+        ('messages', 'Messages'),
+        ('notifications', 'Notifications'),
+        ('collaborations', 'Collaborations'),
+    ]
+    collection = models.CharField(max_length=20, choices=COLLECTION_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    # The idea the object belongs to, and the user it is private to (like
+    # owner, notification recipient, collaborator), where there is one.
+    idea_id = models.BigIntegerField(null=True, blank=True)
+    user_id = models.BigIntegerField(null=True, blank=True)
+    # Idea changes that everyone who could see the idea must hear about even
+    # though it is not public now: it was deleted or made private.
+    was_public = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['collection', 'id'], name='core_change_collection'),
+            models.Index(fields=['collection', 'user_id', 'id'], name='core_change_user'),
+            models.Index(fields=['collection', 'idea_id', 'id'], name='core_change_idea'),
+        ]
+
+    def __str__(self):
+        return f"{'Delete' if self.deleted else 'Upsert'} {self.collection} {self.object_id}"
+
+
+class AccountDeletion(models.Model):
+    # Progress of a background account deletion (core.deletion). user_id is
+    # a plain column so the record outlives the account it removed.
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    user_id = models.BigIntegerField(unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # The step being worked on and the rows removed so far, per step.
+    step = models.CharField(max_length=50, blank=True)
+    progress = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Deletion of user {self.user_id} ({self.status})"
+
+
+class TrendingIdea(models.Model):
+    # Summary table behind the trending tab, rebuilt by refresh_trending from
+    # the recent likes and comments. Ideas without recent activity have no row.
+    idea = models.OneToOneField(Idea, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    score = models.FloatField()
+    recent_likes = models.PositiveIntegerField(default=0)
+    recent_comments = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', '-idea'], name='core_trending_score'),
+        ]
+
     def __str__(self):
-        return f"Message by {self.sender} on {self.idea}"
\ No newline at end of file
+        return f"{self.idea_id} trending at {self.score:.2f}"
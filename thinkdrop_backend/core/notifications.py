@@ -0,0 +1,224 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import User, Idea, Notification
+from .realtime import broadcast_notification, broadcast_unread_count
+from .sync import change, record_many
+from .tasks import enqueue, handler
+
+MESSAGE_TEMPLATES = {
+    'like': "{sender} liked your idea '{title}'",
+    'comment': "{sender} commented on your idea '{title}'",
+    'collab_request': "{sender} requested to collaborate on your idea '{title}'",
+    'collab_approved': "Your collaboration request for '{title}' was approved",
+    'collab_rejected': "Your collaboration request for '{title}' was rejected",
+}
+
+# Compacted like/comment notifications.
+COMPACT_TEMPLATES = {
+    'like': "{count} people liked your idea '{title}'",
+    'comment': "{count} comments on your idea '{title}'",
+}
+
+# The counter is kept exact by increments and decrements; the timeout only
+# bounds how long a missed update can leave it wrong.
+UNREAD_COUNT_TIMEOUT = 60 * 60
+
+
+def unread_cache_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    key = unread_cache_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.add(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    try:
+        cache.incr(unread_cache_key(user_id), delta)
+    except ValueError:
+        # Not cached; the next read recounts.
+        pass
+
+
+def reset_unread_count(user_id):
+    cache.delete(unread_cache_key(user_id))
+
+
+def mark_read(user_id, ids=None):
+    # One UPDATE for the whole set (every unread notification when ids is
+    # None); returns how many flipped.
+    with transaction.atomic():
+        unread = Notification.objects.select_for_update().filter(user_id=user_id, is_read=False)
+        if ids is not None:
+            unread = unread.filter(id__in=ids)
+        rows = list(unread.values_list('id', 'idea_id'))
+        if not rows:
+            return 0
+        Notification.objects.filter(id__in=[notification_id for notification_id, _ in rows]).update(is_read=True)
+        record_many([
+            change('notifications', notification_id, idea_id=idea_id, user_id=user_id)
+            for notification_id, idea_id in rows
+        ])
+        transaction.on_commit(lambda: settle_unread_count(user_id, -len(rows)))
+    return len(rows)
+
+
+def delete_rows(notifications):
+    # One DELETE per batch with no per-row signals: the sync tombstones are
+    # written here with a single insert. Nothing settles the unread counter,
+    # so callers either delete read rows only or recount afterwards.
+    rows = list(notifications.values_list('id', 'idea_id', 'user_id'))
+    if not rows:
+        return 0
+    record_many([
+        change('notifications', notification_id, deleted=True, idea_id=idea_id, user_id=user_id)
+        for notification_id, idea_id, user_id in rows
+    ])
+    deleted = Notification.objects.filter(id__in=[row[0] for row in rows])
+    deleted._raw_delete(deleted.db)
+    return len(rows)
+
+
+def delete_read(user_id):
+    with transaction.atomic():
+        return delete_rows(Notification.objects.filter(user_id=user_id, is_read=True))
+
+
+def purge_read(before, batch_size=1000):
+    # Retention: read notifications older than `before`, a batch per
+    # transaction so the inbox index is never locked for long.
+    total = 0
+    while True:
+        with transaction.atomic():
+            batch = Notification.objects.filter(is_read=True, created_at__lt=before).order_by('id')[:batch_size]
+            deleted = delete_rows(Notification.objects.filter(id__in=list(batch.values_list('id', flat=True))))
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def compact(before):
+    # Folds each user's like/comment notifications on one idea older than
+    # `before` into the newest of them ("12 people liked ..."). Returns the
+    # number of rows removed.
+    groups = (
+        Notification.objects
+        .filter(type__in=list(COMPACT_TEMPLATES), created_at__lt=before)
+        .values('user_id', 'idea_id', 'type')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    removed = 0
+    for group in groups.iterator():
+        removed += compact_group(group['user_id'], group['idea_id'], group['type'], before)
+    return removed
+
+
+def compact_group(user_id, idea_id, type, before):
+    with transaction.atomic():
+        rows = list(
+            Notification.objects.select_for_update()
+            .filter(user_id=user_id, idea_id=idea_id, type=type, created_at__lt=before)
+            .order_by('-created_at', '-id')
+            .values_list('id', 'actor_count', 'is_read')
+        )
+        if len(rows) < 2:
+            return 0
+        keep_id = rows[0][0]
+        title = Idea.objects.filter(pk=idea_id).values_list('title', flat=True).first() or ''
+        actors = sum(actor_count for _, actor_count, _ in rows)
+        Notification.objects.filter(id=keep_id).update(
+            actor_count=actors,
+            # Still unread if any of the folded ones was.
+            is_read=all(is_read for _, _, is_read in rows),
+            message=COMPACT_TEMPLATES[type].format(count=actors, title=title),
+        )
+        record_many([change('notifications', keep_id, idea_id=idea_id, user_id=user_id)])
+        folded = Notification.objects.filter(id__in=[row[0] for row in rows[1:]])
+        # Unread ones are folded too and the kept row's read flag was
+        # rewritten, so the counter is recounted instead.
+        removed = delete_rows(folded)
+        transaction.on_commit(lambda: reset_unread_count(user_id))
+    return removed
+
+
+def settle_unread_count(user_id, delta):
+    adjust_unread_count(user_id, delta)
+    broadcast_unread_count(user_id)
+
+
+def publish_notification(notification):
+    adjust_unread_count(notification.user_id, 1)
+    broadcast_notification(notification)
+
+
+def queue_notification(type, user_id, sender_id, idea_id):
+    # 'unlike' never produces a row; it cancels a pending 'like'.
+    event = {'type': type, 'user_id': user_id, 'sender_id': sender_id, 'idea_id': idea_id}
+    transaction.on_commit(lambda: enqueue('notifications', event))
+
+
+def collapse_events(events):
+    pending = {}
+    for position, event in enumerate(events):
+        if event['type'] in ('like', 'unlike'):
+            key = ('like', event['user_id'], event['sender_id'], event['idea_id'])
+            pending.pop(key, None)
+            if event['type'] == 'like':
+                pending[key] = event
+        else:
+            pending[position] = event
+    return list(pending.values())
+
+
+@handler('notifications')
+def deliver_notifications(events):
+    events = collapse_events(events)
+    likes = [event for event in events if event['type'] == 'like']
+    if likes:
+        # A like that is still sitting unread in the inbox is not repeated.
+        unread_likes = set(Notification.objects.filter(
+            type='like',
+            is_read=False,
+            idea_id__in={event['idea_id'] for event in likes},
+            sender_id__in={event['sender_id'] for event in likes},
+        ).values_list('user_id', 'sender_id', 'idea_id'))
+        events = [
+            event for event in events
+            if event['type'] != 'like' or (event['user_id'], event['sender_id'], event['idea_id']) not in unread_likes
+        ]
+    if not events:
+        return
+
+    senders = dict(User.objects.filter(id__in={event['sender_id'] for event in events}).values_list('id', 'username'))
+    titles = dict(Idea.objects.filter(id__in={event['idea_id'] for event in events}).values_list('id', 'title'))
+    notifications = [
+        Notification(
+            user_id=event['user_id'],
+            sender_id=event['sender_id'],
+            idea_id=event['idea_id'],
+            type=event['type'],
+            message=MESSAGE_TEMPLATES[event['type']].format(
+                sender=senders[event['sender_id']], title=titles[event['idea_id']]
+            ),
+        )
+        for event in events
+        # The idea or sender may have been deleted while the event was queued.
+        if event['sender_id'] in senders and event['idea_id'] in titles
+    ]
+    with transaction.atomic():
+        created = Notification.objects.bulk_create(notifications)
+        record_many([
+            change('notifications', notification.pk, idea_id=notification.idea_id, user_id=notification.user_id)
+            for notification in created
+        ])
+        for notification in created:
+            transaction.on_commit(lambda notification=notification: publish_notification(notification))
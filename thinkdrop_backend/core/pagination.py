@@ -0,0 +1,156 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.utils.dateparse import parse_datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    # The cursor encodes the last row's ordering values, so every page is one
+    # index range scan and rows inserted at the head never shift later pages.
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        try:
+            if position is not None:
+                queryset = queryset.filter(self.after(position))
+            rows = list(queryset[:self.page_size_value + 1])
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+        self.has_next = len(rows) > self.page_size_value
+        self.page = rows[:self.page_size_value]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def field_names(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def after(self, position):
+        # (a, b) past (x, y) in the page direction: a beyond x, or a == x and b beyond y.
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def position_of(self, row):
+        values = []
+        for name in self.field_names():
+            value = getattr(row, name)
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        return values
+
+    def encode_cursor(self, position):
+        encoded = urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode('ascii'))
+        return encoded.decode('ascii')
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            position = json.loads(urlsafe_b64decode(cursor.encode('ascii')))
+        except (TypeError, ValueError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        cursor = self.encode_cursor(self.position_of(self.page[-1]))
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class IdeaPagination(KeysetPagination):
+    page_size = 10
+    max_page_size = 50
+    ordering = ('-ranked_at', '-id')
+
+    def ranked_before(self, request):
+        # The cursor's ranked_at, for bounding the feed before paginating.
+        position = self.decode_cursor(request)
+        if position is None:
+            return None
+        try:
+            value = parse_datetime(position[0])
+        except (TypeError, ValueError):
+            value = None
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value
+
+
+class TrendingPagination(KeysetPagination):
+    # Scores only move when refresh_trending runs; a refresh between two
+    # pages can repeat or skip an idea, which a trending list tolerates.
+    page_size = 10
+    max_page_size = 50
+    ordering = ('-trending_score', '-id')
+
+
+class CommentPagination(KeysetPagination):
+    page_size = 20
+
+
+class MessagePagination(KeysetPagination):
+    # Pages walk back from the newest message, but each page is returned
+    # oldest first so chat clients can render it in reading order.
+    page_size = 50
+
+    def get_paginated_response(self, data):
+        return super().get_paginated_response(list(reversed(data)))
+
+
+class NotificationPagination(KeysetPagination):
+    page_size = 20
+
+
+class SearchPagination(PageNumberPagination):
+    # Relevance ranks are floats recomputed per query, so search pages by
+    # number; results are rarely read past the first few pages.
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 50
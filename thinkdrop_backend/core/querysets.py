@@ -0,0 +1,54 @@
+from django.db.models import Count, Exists, IntegerField, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .fieldsets import includes, expands
+from .models import User, Idea, IdeaCategory, Like, Comment
+
+
+def count_of(model, field, ref='pk'):
+    rows = (
+        model.objects
+        .filter(**{field: OuterRef(ref)})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+def author_queryset():
+    # Only the columns AuthorSerializer renders.
+    return User.objects.only(
+        'id', 'username', 'first_name', 'last_name', 'profession', 'profile_pic', 'profile_pic_variants',
+    )
+
+
+def profile_queryset(context=None):
+    if not includes(context, 'comment_count'):
+        return User.objects.all()
+    return User.objects.annotate(comment_total=count_of(Comment, 'user'))
+
+
+def idea_queryset(request=None, queryset=None, context=None):
+    # Everything IdeaSerializer renders comes back with the page: the
+    # liked-by-me flag as an annotation, authors and categories prefetched.
+    # Like and comment counts are stored on Idea itself. Given the response
+    # context, fields left out by ?fields=/?expand= are not loaded at all.
+    if queryset is None:
+        queryset = Idea.objects.all()
+    queryset = queryset.defer('search_vector')
+    if not includes(context, 'description'):
+        queryset = queryset.defer('description')
+    if expands(context, 'user'):
+        queryset = queryset.prefetch_related(Prefetch('user', queryset=author_queryset()))
+    if includes(context, 'categories'):
+        queryset = queryset.prefetch_related(
+            Prefetch('idea_categories', queryset=IdeaCategory.objects.select_related('category')),
+        )
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and includes(context, 'is_liked'):
+        queryset = queryset.annotate(
+            liked_by_me=Exists(Like.objects.filter(idea=OuterRef('pk'), user=user))
+        )
+    return queryset
@@ -0,0 +1,56 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+
+def message_group_name(idea_id):
+    return f'idea_{idea_id}_messages'
+
+
+def broadcast_message(message):
+    from .serializers import MessageSerializer
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(message_group_name(message.idea_id), {
+        'type': 'chat.message',
+        'message': MessageSerializer(message).data,
+    })
+
+
+def broadcast_group_changed(idea_id):
+    # Open chat sockets of the idea re-check membership and close if it is gone.
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(message_group_name(idea_id), {'type': 'group.changed'})
+
+
+def notification_group_name(user_id):
+    return f'user_{user_id}_notifications'
+
+
+def broadcast_notification(notification):
+    from .notifications import unread_count
+    from .serializers import NotificationEventSerializer
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(notification_group_name(notification.user_id), {
+        'type': 'notification.created',
+        'notification': NotificationEventSerializer(notification).data,
+        'unread_count': unread_count(notification.user_id),
+    })
+
+
+def broadcast_unread_count(user_id):
+    from .notifications import unread_count
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(notification_group_name(user_id), {
+        'type': 'notification.unread',
+        'unread_count': unread_count(user_id),
+    })
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .consumers import GroupChatConsumer, NotificationConsumer
+
+websocket_urlpatterns = [
+    path('ws/ideas/<int:idea_id>/messages/', GroupChatConsumer.as_asgi()),
+    path('ws/notifications/', NotificationConsumer.as_asgi()),
+]
@@ -0,0 +1,41 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from .models import User, Idea, Category
+
+SEARCH_CONFIG = 'english'
+USER_RESULTS_LIMIT = 10
+CATEGORY_RESULTS_LIMIT = 10
+
+
+def search_ideas(query, queryset=None):
+    # search_vector is kept current by a database trigger (migration 0013)
+    # and backed by a GIN index, so matching never scans the idea table.
+    if queryset is None:
+        queryset = Idea.objects.filter(visibility__in=['public', 'partial'])
+    search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+    return queryset.filter(search_vector=search_query).annotate(
+        rank=SearchRank(F('search_vector'), search_query)
+    ).order_by('-rank', '-id')
+
+
+def search_users(query, queryset=None):
+    # Word similarity (<%) matches prefixes and small typos, and the filter
+    # runs off the gin_trgm_ops indexes on username and email.
+    if queryset is None:
+        queryset = User.objects.all()
+    return queryset.filter(
+        Q(username__trigram_word_similar=query) | Q(email__trigram_word_similar=query)
+    ).annotate(
+        similarity=Greatest(
+            TrigramWordSimilarity(query, 'username'),
+            TrigramWordSimilarity(query, 'email'),
+        )
+    ).order_by('-similarity', 'username')[:USER_RESULTS_LIMIT]
+
+
+def search_categories(query):
+    return Category.objects.filter(name__trigram_word_similar=query).annotate(
+        similarity=TrigramWordSimilarity(query, 'name')
+    ).order_by('-similarity', 'name')[:CATEGORY_RESULTS_LIMIT]
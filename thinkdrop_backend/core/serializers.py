@@ -1,13 +1,31 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
 from rest_framework import serializers
-from .models import User, Idea, Collaboration, Comment, Report, Category, IdeaCategory, Notification, Message 
+from django.core.files.storage import default_storage
+from .fieldsets import SparseFieldsMixin, fieldset_context
+from .images import pick_variant, delete_variants, queue_profile_pic_variants
+from .uploads import file_url, stored_files
+from .models import User, Idea, Collaboration, Comment, Report, Category, IdeaCategory, Like, Notification, Message, UploadSession
 
-class UserSerializer(serializers.ModelSerializer):
+class ProfilePicField(serializers.ImageField):
+    # Accepts the upload; renders the resized variant matching the size hint.
+    def to_representation(self, value):
+        if not value:
+            return '/media/profile_pics/default.jpg'
+        url = default_storage.url(pick_variant(value.name, value.instance.profile_pic_variants, self.context))
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(url)
+        return url
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     social_links = serializers.JSONField(default=list, required=False)
     skills = serializers.JSONField(default=list, required=False)
     interests = serializers.JSONField(default=list, required=False)
-    profile_pic = serializers.SerializerMethodField()
-    comment_count = serializers.IntegerField(read_only=True, source='comments.count')
-    comment_count = serializers.IntegerField(read_only=True, source='comments.count')
+    profile_pic = ProfilePicField(required=False)
+    comment_count = serializers.SerializerMethodField()
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'password', 'first_name', 'last_name', 'bio', 'profession', 
@@ -24,13 +42,10 @@ class UserSerializer(serializers.ModelSerializer):
             'social_links': {'required': False, 'allow_null': True}
         }
 
-    def get_profile_pic(self, obj):
-        if obj.profile_pic and hasattr(obj.profile_pic, 'url'):
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.profile_pic.url)
-            return obj.profile_pic.url
-        return '/media/profile_pics/default.jpg'
+    def get_comment_count(self, obj):
+        if hasattr(obj, 'comment_total'):
+            return obj.comment_total
+        return obj.comments.count()
 
     def validate_social_links(self, value):
         if value is None:
@@ -84,7 +99,10 @@ class UserSerializer(serializers.ModelSerializer):
         user.interests = validated_data.get('interests', [])
         if 'profile_pic' in validated_data:
             user.profile_pic = validated_data['profile_pic']
+            user.profile_pic_variants = {}
         user.save()
+        if 'profile_pic' in validated_data:
+            queue_profile_pic_variants(user)
         return user
 
     def update(self, instance, validated_data):
@@ -96,8 +114,15 @@ class UserSerializer(serializers.ModelSerializer):
         instance.skills = validated_data.get('skills', instance.skills)
         instance.interests = validated_data.get('interests', instance.interests)
         if 'profile_pic' in validated_data:
+            stale_variants = instance.profile_pic_variants
             instance.profile_pic = validated_data['profile_pic']
+            # The old picture's variants must not stand in for the new one;
+            # the original is served until its own are built.
+            instance.profile_pic_variants = {}
         instance.save()
+        if 'profile_pic' in validated_data:
+            transaction.on_commit(lambda: delete_variants(stale_variants))
+            queue_profile_pic_variants(instance)
         return instance
 
     def _parse_list(self, value):
@@ -105,36 +130,138 @@ class UserSerializer(serializers.ModelSerializer):
             return [item.strip() for item in value.split(',') if item.strip()]
         return value if value else []
 
-class IdeaSerializer(serializers.ModelSerializer):
-    time_since = serializers.CharField(read_only=True)
+class AuthorSerializer(serializers.ModelSerializer):
+    # Compact user for nesting in ideas, comments, messages and notifications;
+    # the full profile is served by users/<id>/.
+    profile_pic = ProfilePicField(read_only=True)
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name', 'profession', 'profile_pic']
+        read_only_fields = fields
+
+SIDELOAD_PARAM = 'sideload'
+
+class AuthorField(serializers.Field):
+    # Each distinct author is rendered once per response. With ?sideload=users
+    # items only carry the user id and the rendered authors go out once in a
+    # top-level "users" map (see sideload_users).
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    @cached_property
+    def author_serializer(self):
+        return AuthorSerializer(context=self.context)
+
+    def to_representation(self, user):
+        authors = self.context.setdefault('authors', {})
+        if user.pk not in authors:
+            authors[user.pk] = self.author_serializer.to_representation(user)
+        if self.context.get(SIDELOAD_PARAM):
+            return user.pk
+        return authors[user.pk]
+
+def response_context(request, **extra):
+    context = {'request': request, **fieldset_context(request), **extra}
+    if request.query_params.get(SIDELOAD_PARAM) == 'users':
+        context[SIDELOAD_PARAM] = True
+    return context
+
+def sideload_users(payload, context, key='users'):
+    # Call after the serializer data has been rendered.
+    if context.get(SIDELOAD_PARAM):
+        payload[key] = {str(pk): data for pk, data in context.get('authors', {}).items()}
+    return payload
+
+def format_time_since(delta):
+    # Largest whole unit only: "3d", "5h", "12m", "40s".
+    if delta.days > 0:
+        return f"{delta.days}d"
+    seconds = int(delta.total_seconds())
+    if seconds >= 3600:
+        return f"{seconds // 3600}h"
+    if seconds >= 60:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
+class TimeSinceField(serializers.ReadOnlyField):
+    # Computed from the datetime itself; "now" is taken once per response so
+    # every item on a page is measured against the same instant.
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'created_at')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        now = self.context.get('now')
+        if now is None:
+            now = self.context['now'] = timezone.now()
+        return format_time_since(now - value)
+
+class IdeaListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Look up attachment variants for the whole page in one query.
+        ideas = list(data.all() if hasattr(data, 'all') else data)
+        if 'file_previews' in self.child.fields:
+            keys = {key for idea in ideas for key in idea.files or []}
+            self.context['stored_files'] = stored_files(keys)
+        return super().to_representation(ideas)
+
+class IdeaSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    time_since = TimeSinceField()
     categories = serializers.SerializerMethodField()
-    user = UserSerializer(read_only=True)
+    user = AuthorField()
     user_id = serializers.PrimaryKeyRelatedField(
         write_only=True, queryset=User.objects.all(), source='user', required=False
     )
     like_count = serializers.IntegerField(read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
     is_liked = serializers.SerializerMethodField()
+    files = serializers.SerializerMethodField()
+    file_previews = serializers.SerializerMethodField()
+    expandable_fields = ('user',)
 
     class Meta:
         model = Idea
+        list_serializer_class = IdeaListSerializer
         fields = [
             'id', 'title', 'short_description', 'description', 'visibility', 
             'user', 'user_id', 'categories', 'created_at', 'time_since', 
-            'files', 'like_count', 'is_liked', 'comment_count',
+            'files', 'file_previews', 'like_count', 'is_liked', 'comment_count',
         ]
         extra_kwargs = {
             'title': {'required': True},
             'description': {'required': True},
             'short_description': {'required': False},
             'visibility': {'required': False},
-            'files': {'read_only': True},
         }
 
+    def get_files(self, obj):
+        request = self.context.get('request')
+        return [file_url(key, request) for key in obj.files or []]
+
+    def get_file_previews(self, obj):
+        # Parallel to files: a resized image URL, or None for non-images and
+        # images whose variants are still being generated.
+        known = self.context.get('stored_files')
+        if known is None:
+            known = stored_files(obj.files or [])
+        request = self.context.get('request')
+        previews = []
+        for key in obj.files or []:
+            stored = known.get(key)
+            if stored is None or not stored.variants:
+                previews.append(None)
+            else:
+                previews.append(file_url(pick_variant(key, stored.variants, self.context, default='medium'), request))
+        return previews
+
     def get_categories(self, obj):
-        categories = IdeaCategory.objects.filter(idea=obj)
-        return [cat.category.name for cat in categories]
+        return [cat.category.name for cat in obj.idea_categories.all()]
 
     def get_is_liked(self, obj):
+        if hasattr(obj, 'liked_by_me'):
+            return obj.liked_by_me
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.likes.filter(user=request.user).exists()
@@ -156,17 +283,19 @@ class IdeaSerializer(serializers.ModelSerializer):
             IdeaCategory.objects.get_or_create(idea=idea, category=category)
         return idea
 
-class CollaborationSerializer(serializers.ModelSerializer):
+class CollaborationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     idea = IdeaSerializer(read_only=True)
-    collaborator = UserSerializer(read_only=True)
+    collaborator = AuthorField()
+    expandable_fields = ('idea', 'collaborator')
 
     class Meta:
         model = Collaboration
         fields = ['id', 'idea', 'collaborator', 'status']
 
-class CommentSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)  # Make user read-only, provided by view
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    user = AuthorField()  # Read-only, provided by view
     idea = serializers.PrimaryKeyRelatedField(read_only=True)  # Make idea read-only, provided by view
+    expandable_fields = ('user',)
 
     class Meta:
         model = Comment
@@ -175,12 +304,17 @@ class CommentSerializer(serializers.ModelSerializer):
             'content': {'required': True},  # Ensure content is required
         }
 
+class LikeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Like
+        fields = ['id', 'idea', 'created_at']
+
 class ReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Report
         fields = '__all__'
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = '__all__'
@@ -197,24 +331,64 @@ class ChangePasswordSerializer(serializers.Serializer):
             raise serializers.ValidationError({'new_password': 'New password must be at least 8 characters'})
         return data
 
-class NotificationSerializer(serializers.ModelSerializer):
-    sender = UserSerializer(read_only=True)
+class NotificationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    sender = AuthorField()
     idea = IdeaSerializer(read_only=True)
     collab_id = serializers.SerializerMethodField()
+    expandable_fields = ('sender', 'idea')
 
     class Meta:
         model = Notification
         fields = '__all__'
 
     def get_collab_id(self, obj):
-        if obj.type.startswith('collab') and obj.sender and obj.idea:
-            collab = Collaboration.objects.filter(idea=obj.idea, collaborator=obj.sender, status='pending').first()
+        if obj.type.startswith('collab') and obj.sender_id and obj.idea_id:
+            if obj.idea and hasattr(obj.idea, 'pending_collaborations'):
+                for collab in obj.idea.pending_collaborations:
+                    if collab.collaborator_id == obj.sender_id:
+                        return collab.id
+                return None
+            collab = Collaboration.objects.filter(idea_id=obj.idea_id, collaborator_id=obj.sender_id, status='pending').first()
             return collab.id if collab else None
         return None
+
+BATCH_LIMIT = 500
+
+class NotificationBatchSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=BATCH_LIMIT)
+    all = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if not data['all'] and not data.get('ids'):
+            raise serializers.ValidationError("Pass ids or all")
+        return data
+
+class IdListSerializer(serializers.Serializer):
+    # Comma-separated ids from a query string.
+    ids = serializers.CharField()
+
+    def validate_ids(self, value):
+        parts = [part.strip() for part in value.split(',') if part.strip()]
+        if not parts or not all(part.isdigit() for part in parts):
+            raise serializers.ValidationError("ids must be a comma-separated list of integers")
+        if len(parts) > BATCH_LIMIT:
+            raise serializers.ValidationError(f"At most {BATCH_LIMIT} ids")
+        return [int(part) for part in parts]
+
+class NotificationEventSerializer(serializers.ModelSerializer):
+    # Compact form pushed over the notification stream.
+    sender_username = serializers.CharField(source='sender.username', read_only=True, default=None)
+    idea_title = serializers.CharField(source='idea.title', read_only=True, default=None)
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'type', 'message', 'is_read', 'created_at', 'idea', 'idea_title', 'sender', 'sender_username']
     
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     sender = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), write_only=True)
-    sender_details = UserSerializer(source='sender', read_only=True)
+    sender_details = AuthorField(source='sender')
+    expandable_fields = ('sender_details',)
+    field_aliases = {'sender_details': 'sender'}
 
     class Meta:
         model = Message
@@ -222,5 +396,17 @@ class MessageSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation['sender'] = representation.pop('sender_details', None)
-        return representation
\ No newline at end of file
+        if 'sender_details' in representation:
+            representation['sender'] = representation.pop('sender_details')
+        return representation
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'size', 'received', 'status', 'sha256', 'created_at']
+        read_only_fields = ['id', 'received', 'status', 'sha256', 'created_at']
+
+    def validate_size(self, value):
+        if value > settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError("File too large")
+        return value
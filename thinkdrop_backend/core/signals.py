@@ -0,0 +1,233 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import forget_auth_record
+from .caching import IDEAS, USERS, CATEGORIES, COLLABORATIONS, COUNTERS, bump_on_commit
+from .groups import invalidate_group
+from .models import User, Idea, Collaboration, Like, Comment, Category, IdeaCategory, Message, Notification
+from .notifications import adjust_unread_count, publish_notification
+from .realtime import broadcast_message, broadcast_group_changed
+from .sync import PUBLIC_VISIBILITY, change, record, record_many
+from .uploads import release_files
+
+
+def adjust_counter(idea_id, field, delta):
+    Idea.objects.filter(pk=idea_id).update(**{field: F(field) + delta})
+
+
+@receiver(post_delete, sender=Idea)
+def idea_deleted(sender, instance, **kwargs):
+    # Covers IdeaDeleteView as well as ideas removed with their owner.
+    release_files(instance.files)
+
+
+@receiver(post_save, sender=Like)
+def like_created(sender, instance, created, **kwargs):
+    if created:
+        adjust_counter(instance.idea_id, 'like_count', 1)
+
+
+@receiver(post_delete, sender=Like)
+def like_deleted(sender, instance, **kwargs):
+    adjust_counter(instance.idea_id, 'like_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        adjust_counter(instance.idea_id, 'comment_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    adjust_counter(instance.idea_id, 'comment_count', -1)
+
+
+@receiver(post_save, sender=Message)
+def message_created(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: broadcast_message(instance))
+
+
+@receiver(post_save, sender=Notification)
+def notification_created(sender, instance, created, **kwargs):
+    # Rows written by the notification pipeline come from bulk_create and
+    # are published there; this covers anything saved individually.
+    if created and not instance.is_read:
+        transaction.on_commit(lambda: publish_notification(instance))
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        transaction.on_commit(lambda: adjust_unread_count(instance.user_id, -1))
+
+
+# Cached responses (core.caching) and collection ETags (core.conditional).
+
+@receiver(post_save, sender=Idea)
+@receiver(post_delete, sender=Idea)
+@receiver(post_save, sender=IdeaCategory)
+@receiver(post_delete, sender=IdeaCategory)
+def ideas_changed(sender, **kwargs):
+    bump_on_commit(IDEAS)
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def counters_changed(sender, **kwargs):
+    bump_on_commit(COUNTERS)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def categories_changed(sender, **kwargs):
+    bump_on_commit(CATEGORIES, IDEAS)
+
+
+# User columns that cached pages and ETags depend on: embedded authors, the
+# interests feeds are ranked by and the fields user search matches. Saves
+# that touch none of them (last_login, password, token_version) keep USERS.
+CACHED_USER_FIELDS = (
+    'username', 'email', 'first_name', 'last_name', 'profession', 'profile_pic', 'profile_pic_variants', 'interests',
+)
+
+
+def cached_user_fields(update_fields):
+    return [name for name in CACHED_USER_FIELDS if update_fields is None or name in update_fields]
+
+
+@receiver(pre_save, sender=User)
+def remember_cached_user_fields(sender, instance, update_fields=None, **kwargs):
+    fields = cached_user_fields(update_fields)
+    instance._saved_cached_fields = (
+        User.objects.filter(pk=instance.pk).values(*fields).first() if instance.pk and fields else None
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    fields = cached_user_fields(update_fields)
+    saved = getattr(instance, '_saved_cached_fields', None)
+    if fields and (created or saved is None or any(getattr(instance, name) != saved[name] for name in fields)):
+        bump_on_commit(USERS)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, **kwargs):
+    bump_on_commit(USERS)
+
+
+@receiver(post_save, sender=Collaboration)
+@receiver(post_delete, sender=Collaboration)
+def collaborations_changed(sender, **kwargs):
+    bump_on_commit(COLLABORATIONS)
+
+
+# Change log for the sync endpoint (core.sync). Written in the same
+# transaction as the change itself.
+
+@receiver(pre_save, sender=Idea)
+def remember_visibility(sender, instance, **kwargs):
+    instance._saved_visibility = (
+        Idea.objects.filter(pk=instance.pk).values_list('visibility', flat=True).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Idea)
+def log_idea_saved(sender, instance, **kwargs):
+    # An idea made private must still reach readers who had it, as a tombstone.
+    went_private = (
+        getattr(instance, '_saved_visibility', None) in PUBLIC_VISIBILITY
+        and instance.visibility not in PUBLIC_VISIBILITY
+    )
+    record('ideas', instance.pk, idea_id=instance.pk, user_id=instance.user_id, was_public=went_private)
+
+
+@receiver(post_delete, sender=Idea)
+def log_idea_deleted(sender, instance, **kwargs):
+    record('ideas', instance.pk, deleted=True, idea_id=instance.pk, user_id=instance.user_id,
+           was_public=instance.visibility in PUBLIC_VISIBILITY)
+
+
+def log_counted(collection, instance, user_id, deleted):
+    # Likes and comments also move the counters on their idea.
+    record_many([
+        change(collection, instance.pk, deleted=deleted, idea_id=instance.idea_id, user_id=user_id),
+        change('ideas', instance.idea_id, idea_id=instance.idea_id),
+    ])
+
+
+@receiver(post_save, sender=Like)
+def log_like_saved(sender, instance, created, **kwargs):
+    if created:
+        log_counted('likes', instance, instance.user_id, deleted=False)
+
+
+@receiver(post_delete, sender=Like)
+def log_like_deleted(sender, instance, **kwargs):
+    log_counted('likes', instance, instance.user_id, deleted=True)
+
+
+@receiver(post_save, sender=Comment)
+def log_comment_saved(sender, instance, created, **kwargs):
+    if created:
+        log_counted('comments', instance, instance.user_id, deleted=False)
+    else:
+        record('comments', instance.pk, idea_id=instance.idea_id, user_id=instance.user_id)
+
+
+@receiver(post_delete, sender=Comment)
+def log_comment_deleted(sender, instance, **kwargs):
+    log_counted('comments', instance, instance.user_id, deleted=True)
+
+
+@receiver(post_save, sender=Message)
+@receiver(post_delete, sender=Message)
+def log_message(sender, instance, **kwargs):
+    record('messages', instance.pk, deleted=kwargs['signal'] is post_delete, idea_id=instance.idea_id, user_id=instance.sender_id)
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def log_notification(sender, instance, **kwargs):
+    # bulk_create and .update() skip this; the notification pipeline and
+    # the mark-read views log those themselves.
+    record('notifications', instance.pk, deleted=kwargs['signal'] is post_delete, idea_id=instance.idea_id, user_id=instance.user_id)
+
+
+@receiver(post_save, sender=Collaboration)
+@receiver(post_delete, sender=Collaboration)
+def log_collaboration(sender, instance, **kwargs):
+    # The idea itself is logged for the collaborator too: joining or leaving
+    # a private idea changes whether they can see it.
+    record_many([
+        change('collaborations', instance.pk, deleted=kwargs['signal'] is post_delete, idea_id=instance.idea_id, user_id=instance.collaborator_id),
+        change('ideas', instance.idea_id, idea_id=instance.idea_id, user_id=instance.collaborator_id),
+    ])
+
+
+# Cached group member sets (core.groups): approve, reject, remove and leave
+# all save or delete the Collaboration row.
+
+@receiver(post_save, sender=Collaboration)
+@receiver(post_delete, sender=Collaboration)
+def group_changed(sender, instance, **kwargs):
+    invalidate_group(instance.idea_id)
+    idea_id = instance.idea_id
+    transaction.on_commit(lambda: broadcast_group_changed(idea_id))
+
+
+@receiver(post_delete, sender=Idea)
+def group_deleted(sender, instance, **kwargs):
+    invalidate_group(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def auth_record_changed(sender, instance, **kwargs):
+    forget_auth_record(instance.pk)
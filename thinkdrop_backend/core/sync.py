@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Idea, Like, Comment, Message, Notification, Collaboration, Change
+
+SYNC_LIMIT = 500
+PUBLIC_VISIBILITY = ['public', 'partial']
+# Change ids come from a sequence when the row is inserted, but the row is
+# only visible once its transaction commits, so a lower id can appear after
+# a higher one was read. Watermarks never move past a change younger than
+# this; it bounds how long a writing transaction may stay open.
+SYNC_SETTLE = timedelta(seconds=30)
+
+
+def change(collection, object_id, deleted=False, idea_id=None, user_id=None, was_public=False):
+    return Change(collection=collection, object_id=object_id, deleted=deleted, idea_id=idea_id, user_id=user_id, was_public=was_public)
+
+
+def record(collection, object_id, deleted=False, idea_id=None, user_id=None, was_public=False):
+    change(collection, object_id, deleted, idea_id, user_id, was_public).save()
+
+
+def record_many(changes):
+    Change.objects.bulk_create(changes)
+
+
+def member_idea_ids(user):
+    return Collaboration.objects.filter(collaborator=user, status='accepted').values('idea_id')
+
+
+def visible_ideas(user):
+    return Idea.objects.filter(
+        Q(visibility__in=PUBLIC_VISIBILITY) | Q(user=user) | Q(pk__in=member_idea_ids(user))
+    )
+
+
+def group_ideas(user):
+    return Idea.objects.filter(Q(user=user) | Q(pk__in=member_idea_ids(user)))
+
+
+def visible_changes(collection, user):
+    changes = Change.objects.filter(collection=collection)
+    if collection == 'ideas':
+        # Ideas the user can see now, their own (user_id is the owner, or a
+        # collaborator who joined or left), and tombstones of ideas that
+        # stopped being public. Private ideas of others never show up.
+        return changes.filter(
+            Q(idea_id__in=visible_ideas(user).values('pk')) | Q(user_id=user.id) | Q(was_public=True)
+        )
+    if collection in ('likes', 'notifications'):
+        return changes.filter(user_id=user.id)
+    if collection == 'comments':
+        return changes.filter(idea_id__in=visible_ideas(user).values('pk'))
+    if collection == 'messages':
+        return changes.filter(idea_id__in=group_ideas(user).values('pk'))
+    if collection == 'collaborations':
+        return changes.filter(Q(user_id=user.id) | Q(idea_id__in=Idea.objects.filter(user=user).values('pk')))
+    raise ValueError(collection)
+
+
+def current_objects(collection, user, ids):
+    # Rows as they are now; ids missing from the result are tombstones.
+    if collection == 'ideas':
+        return visible_ideas(user).filter(pk__in=ids)
+    if collection == 'likes':
+        return Like.objects.filter(pk__in=ids, user=user)
+    if collection == 'comments':
+        return Comment.objects.filter(pk__in=ids)
+    if collection == 'messages':
+        return Message.objects.filter(pk__in=ids)
+    if collection == 'notifications':
+        return Notification.objects.filter(pk__in=ids, user=user)
+    if collection == 'collaborations':
+        return Collaboration.objects.filter(pk__in=ids)
+    raise ValueError(collection)
+
+
+def changes_since(collection, user, watermark, limit=SYNC_LIMIT, now=None):
+    # Returns ({object_id: deleted}, new watermark, has_more). Several changes
+    # to one object collapse into the last one. Changes younger than
+    # SYNC_SETTLE are returned but the watermark stays below them, so they
+    # come again next time rather than risk skipping one still in flight.
+    settled_before = (now or timezone.now()) - SYNC_SETTLE
+    rows = list(
+        visible_changes(collection, user)
+        .filter(id__gt=watermark)
+        .order_by('id')
+        .values_list('id', 'object_id', 'deleted', 'created_at')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    latest = {}
+    for change_id, object_id, deleted, created_at in rows:
+        latest[object_id] = deleted
+    settled = 0
+    while settled < len(rows) and rows[settled][3] < settled_before:
+        settled += 1
+    if settled:
+        watermark = rows[settled - 1][0]
+    if settled < len(rows):
+        # The rest of the page is too recent; the client polls again later.
+        has_more = False
+    elif not rows and not has_more:
+        # Nothing visible past the watermark: move it to the last settled
+        # change of the log so the next call does not rescan other users'.
+        head = (
+            Change.objects.filter(collection=collection, created_at__lt=settled_before)
+            .order_by('-id').values_list('id', flat=True).first()
+        )
+        watermark = max(watermark, head or 0)
+    return latest, watermark, has_more
@@ -0,0 +1,113 @@
+import logging
+import queue
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+handlers = {}
+
+
+def handler(topic):
+    # Handlers take a list of payloads so they can batch their writes.
+    def register(func):
+        handlers[topic] = func
+        return func
+    return register
+
+
+def dispatch(topic, payloads):
+    try:
+        handlers[topic](payloads)
+    except Exception:
+        logger.exception("Task handler for %r failed on %d payload(s)", topic, len(payloads))
+
+
+def dispatch_batch(batch):
+    by_topic = defaultdict(list)
+    for topic, payload in batch:
+        by_topic[topic].append(payload)
+    for topic, payloads in by_topic.items():
+        dispatch(topic, payloads)
+
+
+class LocalBroker:
+    # In-process queue drained by a small pool of daemon threads. Work still
+    # queued when the process exits is lost; plug in a durable broker with the
+    # same publish()/join() interface if that matters.
+    def __init__(self, workers=2, batch_size=100):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def publish(self, topic, payload):
+        self.start()
+        self.queue.put((topic, payload))
+
+    def start(self):
+        with self.lock:
+            if self.threads:
+                return
+            for number in range(self.workers):
+                thread = threading.Thread(target=self.run, name=f'core-tasks-{number}', daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def take_batch(self):
+        batch = [self.queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.take_batch()
+            close_old_connections()
+            try:
+                dispatch_batch(batch)
+            finally:
+                close_old_connections()
+                for _ in batch:
+                    self.queue.task_done()
+
+    def join(self):
+        self.queue.join()
+
+
+class ImmediateBroker:
+    # Stand-in for tests: runs the handler in the publishing thread.
+    def __init__(self, **options):
+        pass
+
+    def publish(self, topic, payload):
+        dispatch(topic, [payload])
+
+    def join(self):
+        pass
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            options = dict(getattr(settings, 'TASK_QUEUE', {}))
+            broker_class = import_string(options.pop('BROKER', 'core.tasks.LocalBroker'))
+            _broker = broker_class(**{name.lower(): value for name, value in options.items()})
+        return _broker
+
+
+def enqueue(topic, payload):
+    get_broker().publish(topic, payload)
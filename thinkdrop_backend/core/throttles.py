@@ -0,0 +1,38 @@
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class FailedLoginThrottle(SimpleRateThrottle):
+    # Only failed logins count: checking a request records nothing, and
+    # LoginView calls record_failure once the credentials are rejected. Signing
+    # in on any number of devices never uses up the limit.
+    recording = False
+
+    def throttle_success(self):
+        if not self.recording:
+            return True
+        return super().throttle_success()
+
+    def record_failure(self, request, view):
+        self.recording = True
+        self.allow_request(request, view)
+
+
+class LoginIPThrottle(FailedLoginThrottle):
+    # Attempts from one client address, whatever account they target.
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginAccountThrottle(FailedLoginThrottle):
+    # Failures against one account, from any number of addresses. Anyone can
+    # trip it for someone else's email, so its window is short: it slows
+    # guessing down without locking the owner out for long.
+    scope = 'login_account'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': email.strip().lower()}
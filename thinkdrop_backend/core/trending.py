@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .caching import TRENDING, bump_on_commit
+from .models import Idea, Like, Comment, TrendingIdea
+
+PUBLIC_VISIBILITY = ['public', 'partial']
+
+# Each like and comment in the window adds its weight, halved for every
+# half-life since it happened. Only the window is read, through the
+# created_at indexes, so a refresh costs the recent activity, not the tables.
+REFRESH_SQL = """
+WITH activity AS (
+    SELECT idea_id, %(like_weight)s AS weight, 1 AS likes, 0 AS comments, created_at
+    FROM {like} WHERE created_at >= %(since)s
+    UNION ALL
+    SELECT idea_id, %(comment_weight)s, 0, 1, created_at
+    FROM {comment} WHERE created_at >= %(since)s
+)
+INSERT INTO {trending} (idea_id, score, recent_likes, recent_comments, refreshed_at)
+SELECT activity.idea_id,
+       SUM(weight * power(0.5, EXTRACT(EPOCH FROM (%(now)s - activity.created_at)) / %(half_life)s)),
+       SUM(likes), SUM(comments), %(now)s
+FROM activity
+JOIN {idea} ON {idea}.id = activity.idea_id
+WHERE {idea}.visibility = ANY(%(visibility)s)
+GROUP BY activity.idea_id
+ON CONFLICT (idea_id) DO UPDATE SET
+    score = EXCLUDED.score,
+    recent_likes = EXCLUDED.recent_likes,
+    recent_comments = EXCLUDED.recent_comments,
+    refreshed_at = EXCLUDED.refreshed_at
+"""
+
+
+def refresh_trending(now=None):
+    # Upserts every idea with activity in the window, then drops the rows
+    # this refresh did not touch: their activity has aged out (or the idea
+    # went private). Readers keep seeing the previous scores until commit.
+    options = settings.TRENDING
+    now = now or timezone.now()
+    sql = REFRESH_SQL.format(
+        like=Like._meta.db_table,
+        comment=Comment._meta.db_table,
+        idea=Idea._meta.db_table,
+        trending=TrendingIdea._meta.db_table,
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {
+                'like_weight': options['LIKE_WEIGHT'],
+                'comment_weight': options['COMMENT_WEIGHT'],
+                'since': now - timedelta(hours=options['WINDOW_HOURS']),
+                'now': now,
+                'half_life': options['HALF_LIFE_HOURS'] * 3600.0,
+                'visibility': PUBLIC_VISIBILITY,
+            })
+            refreshed = cursor.rowcount
+        dropped, _ = TrendingIdea.objects.filter(refreshed_at__lt=now).delete()
+        bump_on_commit(TRENDING)
+    return refreshed, dropped
+
+
+def trending_queryset():
+    # Reads the summary table only; visibility is checked again in case an
+    # idea went private since the last refresh.
+    return Idea.objects.filter(
+        trending__isnull=False,
+        visibility__in=PUBLIC_VISIBILITY,
+    ).annotate(trending_score=F('trending__score'))
@@ -0,0 +1,351 @@
+import hashlib
+import json
+import os
+from collections import Counter
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from django.db import connection, transaction
+from django.db.models import F
+
+from .images import delete_variants, queue_file_variants
+from .models import StoredFile, UploadSession
+
+# Leading bytes of the attachment types we accept.
+SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'%PDF-', 'application/pdf'),
+]
+
+
+def sniff_content_type(head):
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def check_content_type(head):
+    content_type = sniff_content_type(head)
+    if content_type not in settings.UPLOAD_ALLOWED_TYPES:
+        return None, "File type not allowed"
+    return content_type, None
+
+
+class StreamingUploadHandler(TemporaryFileUploadHandler):
+    # Spools every file straight to disk (never into worker memory), checks
+    # type and size as chunks arrive, and hashes the content on the way.
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+        self.received = 0
+        self.sniffed_type = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0:
+            self.sniffed_type, error = check_content_type(raw_data)
+            if error:
+                self.reject(error)
+        self.received += len(raw_data)
+        if self.received > settings.UPLOAD_MAX_SIZE:
+            self.reject("File too large")
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.hasher.hexdigest()
+        file.content_type = self.sniffed_type
+        return file
+
+    def reject(self, reason):
+        if not hasattr(self.request, 'rejected_uploads'):
+            self.request.rejected_uploads = []
+        self.request.rejected_uploads.append({'file': self.file_name, 'error': reason})
+        self.file.close()
+        raise SkipFile()
+
+
+class StreamingUploadMixin:
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [StreamingUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+
+def session_path(session):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, f'{session.id}.part')
+
+
+def append_chunk(session, stream, length):
+    # Copies the request body onto the partial file in bounded reads. Bytes
+    # past session.received (left by a request that died mid-write) are
+    # dropped first, so the file always matches the recorded offset.
+    if stream is None:
+        return "Empty chunk"
+    path = session_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    remaining = length
+    with open(path, 'ab') as partial:
+        partial.truncate(session.received)
+        partial.seek(session.received)
+        while remaining > 0:
+            data = stream.read(min(remaining, settings.UPLOAD_CHUNK_SIZE))
+            if not data:
+                break
+            if session.received == 0 and remaining == length:
+                content_type, error = check_content_type(data)
+                if error:
+                    return error
+                session.content_type = content_type
+            partial.write(data)
+            remaining -= len(data)
+        session.received = partial.tell()
+    return None
+
+
+def finish_session(session):
+    hasher = hashlib.sha256()
+    with open(session_path(session), 'rb') as partial:
+        for chunk in iter(lambda: partial.read(settings.UPLOAD_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    session.sha256 = hasher.hexdigest()
+    session.status = 'complete'
+
+
+def remove_partial(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def discard_session(session):
+    # The partial file goes once the row is gone for good.
+    path = session_path(session)
+    session.delete()
+    transaction.on_commit(lambda: remove_partial(path))
+
+
+def expire_sessions(before, batch_size=100):
+    # Sessions nobody wrote to or attached since `before`, with their
+    # partial files. Returns how many were dropped.
+    expired = 0
+    while True:
+        with transaction.atomic():
+            sessions = list(
+                UploadSession.objects.select_for_update(skip_locked=True)
+                .filter(updated_at__lt=before).order_by('updated_at')[:batch_size]
+            )
+            for session in sessions:
+                discard_session(session)
+        expired += len(sessions)
+        if len(sessions) < batch_size:
+            return expired
+
+
+EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'application/pdf': '.pdf',
+}
+
+
+STORED_FILES_DIR = 'idea_files'
+
+
+def content_key(sha256, content_type):
+    return f'{STORED_FILES_DIR}/{sha256[:2]}/{sha256}{EXTENSIONS.get(content_type, "")}'
+
+
+def lock_content(sha256):
+    # Serialises writing and deleting the blobs of one content hash. Held
+    # until the surrounding transaction ends.
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [sha256])
+
+
+def store_file(file, sha256, content_type):
+    # Content that is already stored is not written again. Returns the key
+    # with one reference taken for the caller, in the same transaction that
+    # creates or finds the row, so a concurrent release cannot drop it.
+    key = content_key(sha256, content_type)
+    with transaction.atomic():
+        lock_content(sha256)
+        stored, created = StoredFile.objects.select_for_update().get_or_create(key=key, defaults={
+            'sha256': sha256,
+            'size': file.size,
+            'content_type': content_type or '',
+            'ref_count': 1,
+        })
+        if not created:
+            StoredFile.objects.filter(pk=stored.pk).update(ref_count=F('ref_count') + 1)
+        if not default_storage.exists(key):
+            default_storage.save(key, file)
+        if created and stored.content_type.startswith('image/'):
+            queue_file_variants(key)
+    return key
+
+
+def store_session(session):
+    with open(session_path(session), 'rb') as partial:
+        key = store_file(File(partial, name=session.filename), session.sha256, session.content_type)
+    discard_session(session)
+    return key
+
+
+def store_uploads(request, upload_ids):
+    # Each returned key carries a reference; pass them to set_idea_files()
+    # as stored= within the same transaction.
+    keys = []
+    for file in request.FILES.getlist('files'):
+        keys.append(store_file(file, file.sha256, file.content_type))
+    sessions = UploadSession.objects.filter(id__in=upload_ids, user=request.user, status='complete')
+    for session in sessions:
+        keys.append(store_session(session))
+    return keys
+
+
+def retain_files(keys):
+    StoredFile.objects.filter(key__in=keys).update(ref_count=F('ref_count') + 1)
+
+
+def release_files(keys):
+    # Drops one reference per key. Rows are locked first, so the count is
+    # re-checked against any store_file() that took a reference meanwhile;
+    # content nobody references any more is removed once this commits.
+    if not keys:
+        return
+    counts = Counter(keys)
+    with transaction.atomic():
+        list(StoredFile.objects.select_for_update().filter(key__in=counts).order_by('pk').values_list('pk'))
+        for count in set(counts.values()):
+            StoredFile.objects.filter(key__in=[key for key in counts if counts[key] == count]).update(ref_count=F('ref_count') - count)
+        delete_orphans(StoredFile.objects.filter(key__in=counts, ref_count__lte=0))
+
+
+def delete_orphans(orphans):
+    orphan_files = list(orphans.values_list('sha256', 'key', 'variants'))
+    if orphan_files:
+        orphans.delete()
+        transaction.on_commit(lambda: delete_stored(orphan_files))
+    return len(orphan_files)
+
+
+def delete_stored(files):
+    # After the rows are gone: a store_file() of the same content may have
+    # recreated the row since, in which case the blob stays.
+    for sha256, key, variants in files:
+        with transaction.atomic():
+            lock_content(sha256)
+            if StoredFile.objects.filter(sha256=sha256).exists():
+                continue
+            default_storage.delete(key)
+            delete_variants(variants)
+
+
+def sweep_stored_files():
+    # Collects what release_files() never saw: rows left unreferenced by an
+    # older store path, and blobs whose row was rolled back with a failed
+    # idea save. Returns (rows, blobs) deleted.
+    with transaction.atomic():
+        rows = delete_orphans(StoredFile.objects.select_for_update(skip_locked=True).filter(ref_count__lte=0))
+    blobs = 0
+    for sha256, names in stored_blobs().items():
+        with transaction.atomic():
+            lock_content(sha256)
+            if StoredFile.objects.filter(sha256=sha256).exists():
+                continue
+            for name in names:
+                default_storage.delete(name)
+            blobs += 1
+    return rows, blobs
+
+
+def stored_blobs():
+    # {sha256: [storage names]} under idea_files/, variants included: they
+    # are named <sha256>_<size>.<ext> next to the original.
+    blobs = {}
+    try:
+        prefixes, _ = default_storage.listdir(STORED_FILES_DIR)
+    except FileNotFoundError:
+        return blobs
+    for prefix in prefixes:
+        _, names = default_storage.listdir(f'{STORED_FILES_DIR}/{prefix}')
+        for name in names:
+            sha256 = os.path.splitext(name)[0].split('_')[0]
+            # Anything else in there (e.g. uploads kept from before content
+            # keys) is not ours to collect.
+            if len(sha256) == 64 and sha256.startswith(prefix):
+                blobs.setdefault(sha256, []).append(f'{STORED_FILES_DIR}/{prefix}/{name}')
+    return blobs
+
+
+def set_idea_files(idea, keys, stored=()):
+    # stored: keys returned by store_uploads(), which already hold one
+    # reference each. Other new keys are retained here; extra references
+    # (content the idea already had, or uploaded twice) are given back.
+    keys = list(dict.fromkeys(keys))
+    old_keys = set(idea.files or [])
+    added = [key for key in keys if key not in old_keys]
+    held = list(stored)
+    for key in added:
+        if key in held:
+            held.remove(key)
+    retain_files([key for key in added if key not in stored])
+    release_files(held + [key for key in old_keys if key not in keys])
+    idea.files = keys
+
+
+def key_from_url(value):
+    # Clients send back the URLs they were given; keep only the storage key.
+    path = urlparse(value).path
+    media_path = urlparse(settings.MEDIA_URL).path
+    if path.startswith(media_path):
+        return path[len(media_path):]
+    return value.lstrip('/')
+
+
+def file_url(key, request=None):
+    url = default_storage.url(key)
+    return request.build_absolute_uri(url) if request else url
+
+
+def stored_files(keys):
+    return {stored.key: stored for stored in StoredFile.objects.filter(key__in=keys).only('key', 'variants')}
+
+
+def upload_errors(request):
+    # Reading FILES runs the upload handlers, which record skipped files.
+    request.FILES
+    return getattr(request, 'rejected_uploads', [])
+
+
+def upload_ids(request):
+    ids = request.data.get('uploads', [])
+    if isinstance(ids, str):
+        ids = json.loads(ids)
+    return ids if isinstance(ids, (list, tuple)) else []
+
+
+def parse_content_range(header):
+    # "bytes <start>-<end>/<total>"
+    try:
+        unit, _, span = header.partition(' ')
+        span, _, total = span.partition('/')
+        start, _, end = span.partition('-')
+        start, end, total = int(start), int(end), int(total)
+    except ValueError:
+        return None
+    if unit != 'bytes' or start < 0 or end < start or end >= total:
+        return None
+    return start, end, total
@@ -4,11 +4,15 @@ from .views import (
     LoginView,
     ProfileUpdateView,
     ProfileView,
+    UserDetailView,
     IdeaCreateView,
+    TrendingView,
     IdeaListView,
     CategoryListView,
     IdeaUpdateView,
     IdeaDeleteView,
+    UploadSessionCreateView,
+    UploadSessionView,
     ReportCreateView,
     LikeIdeaView,
     ChangePasswordView,
@@ -21,9 +25,13 @@ from .views import (
     CollaborationApproveRejectView, 
     NotificationListView,
     NotificationMarkReadView,
+    NotificationBatchView,
+    LikeStateView,
+    NotificationUnreadCountView,
     MessageListCreateView,
     CollaborationListView,
-    GroupMembersView, RemoveMemberView, LeaveGroupView
+    GroupMembersView, RemoveMemberView, LeaveGroupView,
+    SyncView,
 )
 from rest_framework_simplejwt.views import TokenRefreshView
 
@@ -33,14 +41,19 @@ urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
     path('profile/update/', ProfileUpdateView.as_view(), name='profile_update'),
     path('profile/', ProfileView.as_view(), name='profile'),
+    path('users/<int:pk>/', UserDetailView.as_view(), name='user_detail'),
     path('ideas/', IdeaCreateView.as_view(), name='idea_create'),
     path('ideas/list/', IdeaListView.as_view(), name='idea_list'),
+    path('ideas/trending/', TrendingView.as_view(), name='idea_trending'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('categories/', CategoryListView.as_view(), name='category_list'),
     path('ideas/<int:pk>/', IdeaUpdateView.as_view(), name='idea_update'),
     path('ideas/<int:pk>/delete/', IdeaDeleteView.as_view(), name='idea_delete'),
+    path('uploads/', UploadSessionCreateView.as_view(), name='upload_create'),
+    path('uploads/<uuid:upload_id>/', UploadSessionView.as_view(), name='upload_session'),
     path('reports/', ReportCreateView.as_view(), name='report_create'),
     path('ideas/like/<int:idea_id>/', LikeIdeaView.as_view(), name='idea_like'),
+    path('ideas/likes/', LikeStateView.as_view(), name='idea_like_state'),
     path('auth/change-password/', ChangePasswordView.as_view(), name='change_password'),
     path('auth/delete-account/', DeleteAccountView.as_view(), name='delete_account'),
     path('search/', SearchView.as_view(), name='search'),
@@ -51,9 +64,12 @@ urlpatterns = [
     path('collab/<int:collab_id>/action/', CollaborationApproveRejectView.as_view(), name='collab_action'),
     path('notifications/', NotificationListView.as_view(), name='notification_list'),
     path('notifications/<int:notification_id>/read/', NotificationMarkReadView.as_view(), name='notification_read'),
+    path('notifications/read/', NotificationBatchView.as_view(), name='notification_batch'),
+    path('notifications/unread-count/', NotificationUnreadCountView.as_view(), name='notification_unread_count'),
     path('ideas/<int:idea_id>/messages/', MessageListCreateView.as_view(), name='message_list_create'),
     path('collaborations/', CollaborationListView.as_view(), name='collaborations_list'),
     path('ideas/<int:idea_id>/group-members/', GroupMembersView.as_view(), name='group_members'),
     path('collaborations/remove/', RemoveMemberView.as_view(), name='remove_member'),
     path('collaborations/leave/', LeaveGroupView.as_view(), name='leave_group'),
+    path('sync/', SyncView.as_view(), name='sync'),
 ]
\ No newline at end of file
@@ -1,26 +1,49 @@
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import authenticate
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser
-from .models import User, Idea, Category, IdeaCategory, Report, Like, Comment, Notification, Message, Collaboration
-from .serializers import UserSerializer, IdeaSerializer, CategorySerializer, ReportSerializer, ChangePasswordSerializer, CommentSerializer, NotificationSerializer, MessageSerializer, CollaborationSerializer
-from django.utils import timezone
-from rest_framework.pagination import PageNumberPagination
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
-from django.db.models import Q
+from .models import User, Idea, Category, IdeaCategory, Like, Comment, Notification, Message, Collaboration, UploadSession
+from .serializers import response_context, sideload_users, LikeSerializer, NotificationBatchSerializer, IdListSerializer, NotificationEventSerializer, UserSerializer, IdeaSerializer, CategorySerializer, ReportSerializer, ChangePasswordSerializer, CommentSerializer, NotificationSerializer, MessageSerializer, CollaborationSerializer, UploadSessionSerializer
+from .authentication import issue_tokens, revoke_tokens
+from .throttles import LoginIPThrottle, LoginAccountThrottle
+from .deletion import request_deletion
+from .caching import IDEAS, USERS, CATEGORIES, COLLABORATIONS, TRENDING, COUNTERS, cached_data
+from .conditional import conditional_get
+from .feed import feed_queryset
+from .trending import trending_queryset
+from .pagination import IdeaPagination, TrendingPagination, CommentPagination, MessagePagination, NotificationPagination, SearchPagination
+from .fieldsets import expands, includes
+from .querysets import idea_queryset, author_queryset, profile_queryset
+from .search import search_ideas, search_users, search_categories
+from .sync import changes_since, current_objects
+from .groups import group, member_ids
+from .notifications import unread_count, queue_notification, mark_read, delete_read
+from .uploads import StreamingUploadMixin, store_uploads, set_idea_files, key_from_url, upload_errors, upload_ids, parse_content_range, append_chunk, finish_session, discard_session
+from django.db.models import Exists, OuterRef, Q, Prefetch
+from django.db import DatabaseError, transaction
 import os
 import json
 from django.db.models import Q  
+
+def page_ids(paginator, request, queryset):
+    # What a cached idea list keeps: the page's ids and its next link.
+    page = paginator.paginate_queryset(queryset.only('id'), request)
+    return {'next': paginator.get_next_link(), 'ids': [idea.pk for idea in page]}
+
+def render_ideas(request, ids, context):
+    # Rows are loaded per request, so counts, is_liked and time_since are never
+    # served from the cache.
+    ideas = {idea.pk: idea for idea in idea_queryset(request, Idea.objects.filter(pk__in=ids), context=context)}
+    return IdeaSerializer([ideas[pk] for pk in ids if pk in ideas], many=True, context=context).data
+
 class RegisterView(APIView):
     def post(self, request):
         serializer = UserSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = issue_tokens(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -28,17 +51,21 @@ class RegisterView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class LoginView(APIView):
+    throttle_classes = [LoginIPThrottle, LoginAccountThrottle]
+
     def post(self, request):
         email = request.data.get('email')
         password = request.data.get('password')
         user = authenticate(request, username=email, password=password)
         if user is not None:
-            refresh = RefreshToken.for_user(user)
+            refresh = issue_tokens(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
                 'user_id': user.id,
             }, status=status.HTTP_200_OK)
+        for throttle in self.get_throttles():
+            throttle.record_failure(request, self)
         return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
 class ChangePasswordView(APIView):
@@ -49,11 +76,11 @@ class ChangePasswordView(APIView):
         if serializer.is_valid():
             user = request.user
             user.set_password(serializer.validated_data['new_password'])
-            user.save()
+            user.save(update_fields=['password'])
             # Invalidate existing tokens
-            RefreshToken.for_user(user).blacklist()
+            revoke_tokens(user)
             # Generate new tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = issue_tokens(user)
             return Response({
                 'message': 'Password changed successfully',
                 'refresh': str(refresh),
@@ -65,20 +92,19 @@ class DeleteAccountView(APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request):
-        user = request.user
-        Idea.objects.filter(user=user).delete()
-        Like.objects.filter(user=user).delete()
-        Report.objects.filter(reporter=user).delete()
-        RefreshToken.for_user(user).blacklist()
-        user.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        # The account is disabled now; its rows and media are removed by the
+        # account_deletion task (core.deletion).
+        deletion = request_deletion(request.user)
+        return Response({'status': deletion.status}, status=status.HTTP_202_ACCEPTED)
 
 class ProfileUpdateView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser]
 
     def patch(self, request):
-        serializer = UserSerializer(request.user, data=request.data, partial=True, context={'request': request})
+        # request.user only carries the auth fields; the serializer needs the row.
+        user = profile_queryset().get(pk=request.user.pk)
+        serializer = UserSerializer(user, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -88,23 +114,40 @@ class ProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        serializer = UserSerializer(request.user)
+        context = response_context(request)
+        serializer = UserSerializer(profile_queryset(context).get(pk=request.user.pk), context=context)
+        return Response(serializer.data)
+
+class UserDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        context = response_context(request)
+        try:
+            user = profile_queryset(context).get(pk=pk)
+        except User.DoesNotExist:
+            return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+        serializer = UserSerializer(user, context=context)
         return Response(serializer.data)
 
 class CategoryListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        categories = Category.objects.all()
-        serializer = CategorySerializer(categories, many=True)
-        return Response(serializer.data)
+        def build():
+            categories = Category.objects.all()
+            return CategorySerializer(categories, many=True, context=response_context(request)).data
+        return Response(cached_data(request, [CATEGORIES], build, per_user=False))
 
-class IdeaCreateView(APIView):
+class IdeaCreateView(StreamingUploadMixin, APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser]
 
     def post(self, request):
         print("Received idea data:", request.data)
+        rejected = upload_errors(request)
+        if rejected:
+            return Response({"files": rejected}, status=status.HTTP_400_BAD_REQUEST)
         serializer = IdeaSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             idea = serializer.save()
@@ -119,106 +162,59 @@ class IdeaCreateView(APIView):
                             IdeaCategory.objects.get_or_create(idea=idea, category=category)
                 except json.JSONDecodeError:
                     return Response({"categories": "Invalid JSON format"}, status=status.HTTP_400_BAD_REQUEST)
-            file_urls = []
-            files = request.FILES.getlist('files')
-            for file in files:
-                file_name = default_storage.get_available_name(f'idea_files/{file.name}')
-                default_storage.save(file_name, ContentFile(file.read()))
-                file_url = f'{request.build_absolute_uri("/")[:-1]}{default_storage.url(file_name)}'
-                file_urls.append(file_url)
-            idea.files = file_urls
-            idea.save()
-            serializer = IdeaSerializer(idea, context={'request': request})
+            try:
+                uploads = upload_ids(request)
+            except json.JSONDecodeError:
+                return Response({"uploads": "Invalid JSON format"}, status=status.HTTP_400_BAD_REQUEST)
+            # References are taken and recorded on the idea in one transaction.
+            with transaction.atomic():
+                keys = store_uploads(request, uploads)
+                set_idea_files(idea, keys, stored=keys)
+                idea.save(update_fields=['files'])
+            context = response_context(request)
+            idea = idea_queryset(request, context=context).get(pk=idea.pk)
+            serializer = IdeaSerializer(idea, context=context)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         print("Serializer errors:", serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class IdeaPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 50
-
 class IdeaListView(APIView):
     permission_classes = [IsAuthenticated]
     pagination_class = IdeaPagination
 
     def get(self, request):
-        user = request.user
-        today = timezone.now()
-        interest_categories = user.interests if user.interests else []
-        user_filter = request.query_params.get('user', None)
-        visibility = request.query_params.get('visibility', None)
-
-        if user_filter and user_filter.isdigit():
-            ideas = Idea.objects.filter(user_id=int(user_filter))
-        else:
-            ideas = Idea.objects.filter(visibility__in=['public', 'partial'])
-
-        if visibility:
-            ideas = ideas.filter(visibility=visibility.lower())
-
-        prioritized_ideas = []
-        for idea in ideas:
-            categories = [cat.category.name for cat in idea.idea_categories.all()]
-            if any(interest in categories for interest in interest_categories):
-                prioritized_ideas.append(idea)
-            else:
-                prioritized_ideas.append(idea)
-
-        if len(prioritized_ideas) < IdeaPagination.page_size:
-            remaining_ideas = Idea.objects.filter(
-                visibility__in=['public', 'partial']
-            ).exclude(id__in=[idea.id for idea in prioritized_ideas]).order_by('-created_at')
-            if user_filter and user_filter.isdigit():
-                remaining_ideas = Idea.objects.filter(user_id=int(user_filter)).exclude(id__in=[idea.id for idea in prioritized_ideas]).order_by('-created_at')
-            if visibility:
-                remaining_ideas = remaining_ideas.filter(visibility=visibility.lower())
-            prioritized_ideas += list(remaining_ideas)[:IdeaPagination.page_size - len(prioritized_ideas)]
+        # Per user: ranking follows the reader's interests.
+        page = cached_data(request, [IDEAS, USERS], lambda: self.build(request))
+        context = response_context(request, image_size='small')
+        data = {'next': page['next'], 'results': render_ideas(request, page['ids'], context)}
+        return Response(sideload_users(data, context))
 
+    def build(self, request):
         paginator = IdeaPagination()
-        page = paginator.paginate_queryset(prioritized_ideas, request)
-        if page is not None:
-            serializer = IdeaSerializer(page, many=True, context={'request': request})
-            for data in serializer.data:
-                created_at = data['created_at']
-                time_diff = today - timezone.datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                days = time_diff.days
-                total_seconds = time_diff.total_seconds()
-                hours = int(total_seconds // 3600)
-                minutes = int((total_seconds % 3600) // 60)
-                seconds = int(total_seconds % 60)
-                if days > 0:
-                    data['time_since'] = f"{days}d"
-                elif hours > 0:
-                    data['time_since'] = f"{hours}h"
-                elif minutes > 0:
-                    data['time_since'] = f"{minutes}m"
-                else:
-                    data['time_since'] = f"{seconds}s"
-                print(f"Idea {data['id']}: created_at={created_at}, time_since={data['time_since']}")
-            return paginator.get_paginated_response(serializer.data)
-
-        serializer = IdeaSerializer(prioritized_ideas, many=True, context={'request': request})
-        for data in serializer.data:
-            created_at = data['created_at']
-            time_diff = today - timezone.datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-            days = time_diff.days
-            total_seconds = time_diff.total_seconds()
-            hours = int(total_seconds // 3600)
-            minutes = int((total_seconds % 3600) // 60)
-            seconds = int(total_seconds % 60)
-            if days > 0:
-                data['time_since'] = f"{days}d"
-            elif hours > 0:
-                data['time_since'] = f"{hours}h"
-            elif minutes > 0:
-                data['time_since'] = f"{minutes}m"
-            else:
-                data['time_since'] = f"{seconds}s"
-            print(f"Idea {data['id']}: created_at={created_at}, time_since={data['time_since']}")
-        return Response(serializer.data)
+        ideas = feed_queryset(
+            request.user,
+            user_filter=request.query_params.get('user', None),
+            visibility=request.query_params.get('visibility', None),
+            before=paginator.ranked_before(request),
+            count=paginator.get_page_size(request) + 1,
+        )
+        return page_ids(paginator, request, ideas)
+
+class TrendingView(APIView):
+    permission_classes = [IsAuthenticated]
+    pagination_class = TrendingPagination
+
+    def get(self, request):
+        # The ranking is the same for everyone, so the ids are shared.
+        page = cached_data(request, [TRENDING, IDEAS], lambda: self.build(request), per_user=False)
+        context = response_context(request, image_size='small')
+        data = {'next': page['next'], 'results': render_ideas(request, page['ids'], context)}
+        return Response(sideload_users(data, context))
+
+    def build(self, request):
+        return page_ids(TrendingPagination(), request, trending_queryset())
 
-class IdeaUpdateView(APIView):
+class IdeaUpdateView(StreamingUploadMixin, APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser]
 
@@ -227,6 +223,9 @@ class IdeaUpdateView(APIView):
             idea = Idea.objects.get(pk=pk, user=request.user)
         except Idea.DoesNotExist:
             return Response({"error": "Idea not found or you don't have permission"}, status=status.HTTP_404_NOT_FOUND)
+        rejected = upload_errors(request)
+        if rejected:
+            return Response({"files": rejected}, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = IdeaSerializer(idea, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
@@ -246,19 +245,71 @@ class IdeaUpdateView(APIView):
             existing_files = request.data.get('existing_files', [])
             if isinstance(existing_files, str):
                 existing_files = json.loads(existing_files)
-            file_urls = existing_files
-            files = request.FILES.getlist('files')
-            for file in files:
-                file_name = default_storage.get_available_name(f'idea_files/{file.name}')
-                default_storage.save(file_name, ContentFile(file.read()))
-                file_url = f'{request.build_absolute_uri("/")[:-1]}{default_storage.url(file_name)}'
-                file_urls.append(file_url)
-            idea.files = file_urls
-
-            serializer.save()
+            kept = [key for key in map(key_from_url, existing_files) if key in idea.files]
+            try:
+                uploads = upload_ids(request)
+            except json.JSONDecodeError:
+                return Response({"uploads": "Invalid JSON format"}, status=status.HTTP_400_BAD_REQUEST)
+
+            with transaction.atomic():
+                keys = store_uploads(request, uploads)
+                set_idea_files(idea, kept + keys, stored=keys)
+                serializer.save()
+            context = response_context(request)
+            idea = idea_queryset(request, context=context).get(pk=idea.pk)
+            serializer = IdeaSerializer(idea, context=context)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class UploadSessionCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = UploadSessionSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save(user=request.user)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class UploadSessionView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        try:
+            session = UploadSession.objects.get(pk=upload_id, user=request.user)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(UploadSessionSerializer(session).data)
+
+    def put(self, request, upload_id):
+        # The body is one raw chunk; it is read from request.stream and never
+        # parsed, so the chunk is not buffered in memory.
+        content_range = parse_content_range(request.headers.get('Content-Range', ''))
+        if content_range is None:
+            return Response({"error": "Invalid Content-Range"}, status=status.HTTP_400_BAD_REQUEST)
+        start, end, total = content_range
+        # The session row stays locked while the chunk is written; a second
+        # PUT for the same upload is turned away instead of waiting.
+        with transaction.atomic():
+            try:
+                session = UploadSession.objects.select_for_update(nowait=True).get(pk=upload_id, user=request.user, status='pending')
+            except UploadSession.DoesNotExist:
+                return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+            except DatabaseError:
+                return Response({"error": "Another chunk is being written"}, status=status.HTTP_409_CONFLICT)
+            if total != session.size:
+                return Response({"error": "Size does not match upload"}, status=status.HTTP_400_BAD_REQUEST)
+            if start != session.received:
+                return Response(UploadSessionSerializer(session).data, status=status.HTTP_409_CONFLICT)
+            error = append_chunk(session, request.stream, end - start + 1)
+            if error:
+                discard_session(session)
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+            if session.received >= session.size:
+                finish_session(session)
+            session.save()
+        return Response(UploadSessionSerializer(session).data)
+
 class IdeaDeleteView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -286,25 +337,40 @@ class LikeIdeaView(APIView):
     def post(self, request, idea_id):
         try:
             idea = Idea.objects.get(id=idea_id)
-            like, created = Like.objects.get_or_create(user=request.user, idea=idea)
+            with transaction.atomic():
+                like, created = Like.objects.get_or_create(user=request.user, idea=idea)
+                if not created:
+                    like.delete()
+            idea.refresh_from_db(fields=['like_count'])
+            # Notification for like; an unlike cancels one still queued
+            if idea.user_id != request.user.id:
+                queue_notification('like' if created else 'unlike', idea.user_id, request.user.id, idea.id)
             if not created:
-                like.delete()
                 return Response({'message': 'Idea unliked', 'like_count': idea.like_count, 'is_liked': False}, status=status.HTTP_200_OK)
-            # Notification for like
-            if idea.user != request.user:
-                Notification.objects.create(
-                    user=idea.user,
-                    sender=request.user,
-                    idea=idea,
-                    type='like',
-                    message=f"{request.user.username} liked your idea '{idea.title}'"
-                )
             return Response({'message': 'Idea liked', 'like_count': idea.like_count, 'is_liked': True}, status=status.HTTP_201_CREATED)
         except Idea.DoesNotExist:
             return Response({'error': 'Idea not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+class LikeStateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # ?ids=1,2,3 -> like state and count for each of those ideas in one query.
+        serializer = IdListSerializer(data={'ids': request.query_params.get('ids', '')})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            rows = Idea.objects.filter(pk__in=serializer.validated_data['ids']).annotate(
+                liked_by_me=Exists(Like.objects.filter(idea=OuterRef('pk'), user=request.user))
+            ).values_list('pk', 'like_count', 'liked_by_me')
+            likes = {
+                str(idea_id): {'is_liked': liked, 'like_count': like_count}
+                for idea_id, like_count, liked in rows
+            }
+        return Response({'likes': likes})
+
 class SearchView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -317,58 +383,62 @@ class SearchView(APIView):
                 'users': []
             }, status=status.HTTP_200_OK)
 
-        # Search ideas
-        ideas = Idea.objects.filter(
-            Q(title__icontains=query) |
-            Q(short_description__icontains=query) |
-            Q(description__icontains=query),
-            visibility__in=['public', 'partial']
+        # Matches are the same for everyone; ideas and users are rendered per
+        # request from the cached ids.
+        found = cached_data(request, [IDEAS, USERS, CATEGORIES], lambda: self.build(request, query), per_user=False)
+        context = response_context(request, image_size='small')
+        users = {user.pk: user for user in profile_queryset().filter(pk__in=found['users'])}
+        user_serializer = UserSerializer(
+            [users[pk] for pk in found['users'] if pk in users], many=True,
+            context={'request': request, 'image_size': 'small'},
         )
-        idea_serializer = IdeaSerializer(ideas, many=True, context={'request': request})
+        payload = {
+            'ideas': render_ideas(request, found['ideas'], context),
+            'count': found['count'],
+            'next': found['next'],
+            'categories': found['categories'],
+            'users': user_serializer.data
+        }
+        # "users" already holds the user matches, so authors go under "authors".
+        return Response(sideload_users(payload, context, key='authors'), status=status.HTTP_200_OK)
+
+    def build(self, request, query):
+        # Search ideas, best match first
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(search_ideas(query).only('id'), request)
 
         # Search categories
-        categories = Category.objects.filter(name__icontains=query)
+        categories = search_categories(query)
         category_serializer = CategorySerializer(categories, many=True)
 
         # Search users
-        users = User.objects.filter(
-            Q(username__icontains=query) |
-            Q(email__icontains=query)
-        )
-        user_serializer = UserSerializer(users, many=True)
-
-        # Add time_since to ideas
-        today = timezone.now()
-        for data in idea_serializer.data:
-            created_at = data['created_at']
-            time_diff = today - timezone.datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-            days = time_diff.days
-            total_seconds = time_diff.total_seconds()
-            hours = int(total_seconds // 3600)
-            minutes = int((total_seconds % 3600) // 60)
-            seconds = int(total_seconds % 60)
-            if days > 0:
-                data['time_since'] = f"{days}d"
-            elif hours > 0:
-                data['time_since'] = f"{hours}h"
-            elif minutes > 0:
-                data['time_since'] = f"{minutes}m"
-            else:
-                data['time_since'] = f"{seconds}s"
+        users = search_users(query, User.objects.only('id'))
 
-        return Response({
-            'ideas': idea_serializer.data,
+        return {
+            'ideas': [idea.pk for idea in page],
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
             'categories': category_serializer.data,
-            'users': user_serializer.data
-        }, status=status.HTTP_200_OK)
+            'users': [user.pk for user in users],
+        }
     
 class CommentListCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, idea_id):
-        comments = Comment.objects.filter(idea_id=idea_id).order_by('-created_at')
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        comments = Comment.objects.filter(idea_id=idea_id)
+        return conditional_get(request, comments, lambda: self.list(request, comments))
+
+    def list(self, request, comments):
+        context = response_context(request)
+        if expands(context, 'user'):
+            comments = comments.prefetch_related(Prefetch('user', queryset=author_queryset()))
+        paginator = CommentPagination()
+        page = paginator.paginate_queryset(comments, request)
+        serializer = CommentSerializer(page, many=True, context=context)
+        response = paginator.get_paginated_response(serializer.data)
+        sideload_users(response.data, context)
+        return response
 
     def post(self, request, idea_id):
         try:
@@ -378,16 +448,11 @@ class CommentListCreateView(APIView):
     
         serializer = CommentSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(user=request.user, idea=idea)
+            with transaction.atomic():
+                serializer.save(user=request.user, idea=idea)
             # Notification for comment
-            if idea.user != request.user:
-                Notification.objects.create(
-                    user=idea.user,
-                    sender=request.user,
-                    idea=idea,
-                    type='comment',
-                    message=f"{request.user.username} commented on your idea '{idea.title}'"
-                )
+            if idea.user_id != request.user.id:
+                queue_notification('comment', idea.user_id, request.user.id, idea.id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -397,7 +462,8 @@ class CommentDeleteView(APIView):
     def delete(self, request, comment_id):
         try:
             comment = Comment.objects.get(id=comment_id, user=request.user)
-            comment.delete()
+            with transaction.atomic():
+                comment.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Comment.DoesNotExist:
             return Response({"error": "Comment not found or you don't own it"}, status=status.HTTP_404_NOT_FOUND)
@@ -408,7 +474,7 @@ class CollaborationRequestView(APIView):
     def post(self, request, idea_id):
         try:
             idea = Idea.objects.get(id=idea_id)
-            if idea.user == request.user:
+            if idea.user_id == request.user.id:
                 return Response({'error': 'Cannot request collaboration on your own idea'}, status=status.HTTP_400_BAD_REQUEST)
             collab, created = Collaboration.objects.get_or_create(idea=idea, collaborator=request.user, defaults={'status': 'pending'})
             if not created and collab.status != 'rejected':
@@ -418,13 +484,7 @@ class CollaborationRequestView(APIView):
                 collab.save()
             
             # Create notification for idea owner
-            Notification.objects.create(
-                user=idea.user,
-                sender=request.user,
-                idea=idea,
-                type='collab_request',
-                message=f"{request.user.username} requested to collaborate on your idea '{idea.title}'"
-            )
+            queue_notification('collab_request', idea.user_id, request.user.id, idea.id)
             return Response({'message': 'Collaboration request sent'}, status=status.HTTP_201_CREATED)
         except Idea.DoesNotExist:
             return Response({'error': 'Idea not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -439,24 +499,12 @@ class CollaborationApproveRejectView(APIView):
             if action == 'approve':
                 collab.status = 'accepted'
                 collab.save()
-                Notification.objects.create(
-                    user=collab.collaborator,
-                    sender=request.user,
-                    idea=collab.idea,
-                    type='collab_approved',
-                    message=f"Your collaboration request for '{collab.idea.title}' was approved"
-                )
+                queue_notification('collab_approved', collab.collaborator_id, request.user.id, collab.idea_id)
                 return Response({'message': 'Collaboration approved'}, status=status.HTTP_200_OK)
             elif action == 'reject':
                 collab.status = 'rejected'
                 collab.save()
-                Notification.objects.create(
-                    user=collab.collaborator,
-                    sender=request.user,
-                    idea=collab.idea,
-                    type='collab_rejected',
-                    message=f"Your collaboration request for '{collab.idea.title}' was rejected"
-                )
+                queue_notification('collab_rejected', collab.collaborator_id, request.user.id, collab.idea_id)
                 return Response({'message': 'Collaboration rejected'}, status=status.HTTP_200_OK)
             else:
                 return Response({'error': 'Invalid action'}, status=status.HTTP_400_BAD_REQUEST)
@@ -473,47 +521,80 @@ class CollaborationListView(APIView):
         ).distinct()
         
         # Get all collaborations for those ideas (status=accepted only)
+        context = response_context(request)
         collabs = Collaboration.objects.filter(
             idea__in=relevant_ideas,
             status='accepted'
-        ).select_related('idea', 'collaborator')
-        
-        serializer = CollaborationSerializer(collabs, many=True)
+        )
+        if expands(context, 'idea'):
+            collabs = collabs.prefetch_related(Prefetch('idea', queryset=idea_queryset(request)))
+        if expands(context, 'collaborator'):
+            collabs = collabs.prefetch_related(Prefetch('collaborator', queryset=author_queryset()))
+
+        serializer = CollaborationSerializer(collabs, many=True, context=context)
+        if context.get('sideload'):
+            return Response(sideload_users({'results': serializer.data}, context))
         return Response(serializer.data)
         
 class NotificationMarkReadView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, notification_id):
-        try:
-            notification = Notification.objects.get(id=notification_id, user=request.user)
-            notification.is_read = True
-            notification.save()
-            return Response({'message': 'Notification marked as read'})
-        except Notification.DoesNotExist:
+        if not Notification.objects.filter(id=notification_id, user=request.user).exists():
             return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+        # Only the request that actually flips the flag moves the counter.
+        mark_read(request.user.id, [notification_id])
+        return Response({'message': 'Notification marked as read'})
+
+class NotificationBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        # {"ids": [...]} marks those read, {"all": true} the whole inbox.
+        serializer = NotificationBatchSerializer(data=request.data)
+        if serializer.is_valid():
+            ids = None if serializer.validated_data['all'] else serializer.validated_data['ids']
+            return Response({'marked_read': mark_read(request.user.id, ids)})
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def delete(self, request):
+        # Removes every notification already read.
+        return Response({'deleted': delete_read(request.user.id)})
 
 class MessageListCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def get(self, request, idea_id):
-        idea = Idea.objects.get(id=idea_id)
-        # Check if user is owner or accepted collaborator
-        if idea.user != request.user and not Collaboration.objects.filter(
-            idea=idea, collaborator=request.user, status='accepted'
-        ).exists():
+    def check_member(self, request, idea_id):
+        # Owner or accepted collaborator, from the cached member set.
+        members = group(idea_id)
+        if members is None:
+            return Response({'error': 'Idea not found'}, status=status.HTTP_404_NOT_FOUND)
+        if request.user.id not in member_ids(members):
             return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
-        messages = Message.objects.filter(idea=idea).order_by('created_at')
-        serializer = MessageSerializer(messages, many=True)
-        return Response(serializer.data)
+        return None
+
+    def get(self, request, idea_id):
+        denied = self.check_member(request, idea_id)
+        if denied:
+            return denied
+        messages = Message.objects.filter(idea_id=idea_id)
+        return conditional_get(request, messages, lambda: self.list(request, messages))
+
+    def list(self, request, messages):
+        context = response_context(request)
+        if expands(context, 'sender'):
+            messages = messages.prefetch_related(Prefetch('sender', queryset=author_queryset()))
+        paginator = MessagePagination()
+        page = paginator.paginate_queryset(messages, request)
+        serializer = MessageSerializer(page, many=True, context=context)
+        response = paginator.get_paginated_response(serializer.data)
+        sideload_users(response.data, context)
+        return response
 
     def post(self, request, idea_id):
-        idea = Idea.objects.get(id=idea_id)
-        # Check if user is owner or accepted collaborator
-        if idea.user != request.user and not Collaboration.objects.filter(
-            idea=idea, collaborator=request.user, status='accepted'
-        ).exists():
-            return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        denied = self.check_member(request, idea_id)
+        if denied:
+            return denied
         data = request.data.copy()
         data['idea'] = idea_id
         data['sender'] = request.user.id
@@ -527,40 +608,56 @@ class NotificationListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-        serializer = NotificationSerializer(notifications, many=True)
-        return Response(serializer.data)
+        notifications = Notification.objects.filter(user=request.user)
+        # Read flags change in place, so the unread count is part of the ETag;
+        # embedded ideas and collab_id follow the ideas and collaborations.
+        return conditional_get(
+            request, notifications, lambda: self.list(request, notifications),
+            namespaces=(USERS, IDEAS, COUNTERS, COLLABORATIONS), unread=Q(is_read=False),
+        )
+
+    def list(self, request, notifications):
+        context = response_context(request)
+        if expands(context, 'sender'):
+            notifications = notifications.prefetch_related(Prefetch('sender', queryset=author_queryset()))
+        # collab_id is resolved from the idea's pending requests, so the idea
+        # is still prefetched (id only) when it is not expanded.
+        ideas = idea_queryset(request) if expands(context, 'idea') else Idea.objects.only('id')
+        if includes(context, 'collab_id'):
+            ideas = ideas.prefetch_related(
+                Prefetch('collaborations', queryset=Collaboration.objects.filter(status='pending'), to_attr='pending_collaborations')
+            )
+        if expands(context, 'idea') or includes(context, 'collab_id'):
+            notifications = notifications.prefetch_related(Prefetch('idea', queryset=ideas))
+        paginator = NotificationPagination()
+        page = paginator.paginate_queryset(notifications, request)
+        serializer = NotificationSerializer(page, many=True, context=context)
+        response = paginator.get_paginated_response(serializer.data)
+        sideload_users(response.data, context)
+        return response
+
+class NotificationUnreadCountView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_count': unread_count(request.user.id)})
 
 class GroupMembersView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, idea_id):
-        try:
-            idea = Idea.objects.get(id=idea_id)
-            # Check access: Owner or accepted collaborator
-            if idea.user != request.user and not Collaboration.objects.filter(
-                idea=idea, collaborator=request.user, status='accepted'
-            ).exists():
-                return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
-            
-            # Get owner and all accepted collaborators
-            members = []
-            members.append({
-                'id': idea.user.id,
-                'username': idea.user.username,
-                'is_owner': True
-            })
-            collabs = Collaboration.objects.filter(idea=idea, status='accepted')
-            for collab in collabs:
-                members.append({
-                    'id': collab.collaborator.id,
-                    'username': collab.collaborator.username,
-                    'is_owner': False
-                })
-            
-            return Response({'members': members})
-        except Idea.DoesNotExist:
+        members = group(idea_id)
+        if members is None:
             return Response({'error': 'Idea not found'}, status=status.HTTP_404_NOT_FOUND)
+        # Check access: Owner or accepted collaborator
+        if request.user.id not in member_ids(members):
+            return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+
+        # Owner first, then accepted collaborators
+        return Response({'members': [
+            {**members['owner'], 'is_owner': True},
+            *({**member, 'is_owner': False} for member in members['collaborators']),
+        ]})
 
 class RemoveMemberView(APIView):
     permission_classes = [IsAuthenticated]
@@ -573,7 +670,7 @@ class RemoveMemberView(APIView):
                 return Response({'error': 'idea_id and member_id required'}, status=status.HTTP_400_BAD_REQUEST)
             idea = Idea.objects.get(id=idea_id)
             # Only owner can remove
-            if idea.user != request.user:
+            if idea.user_id != request.user.id:
                 return Response({'detail': 'Only owner can remove members'}, status=status.HTTP_403_FORBIDDEN)
             # Find and delete collaboration for this member
             collab = Collaboration.objects.get(idea=idea, collaborator_id=member_id, status='accepted')
@@ -595,4 +692,68 @@ class LeaveGroupView(APIView):
             collab.delete()
             return Response({'message': 'You left the group'})
         except Collaboration.DoesNotExist:
-            return Response({'error': 'You are not a member of this group'}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+            return Response({'error': 'You are not a member of this group'}, status=status.HTTP_404_NOT_FOUND)
+
+class SyncView(APIView):
+    # ?ideas=<watermark>&comments=<watermark>... returns, per requested
+    # collection, what changed since that watermark and the next watermark
+    # to send. Upserts carry the current row; deletes (and rows no longer
+    # visible) come back as ids in "deleted".
+    permission_classes = [IsAuthenticated]
+    collections = ['ideas', 'likes', 'comments', 'messages', 'notifications', 'collaborations']
+
+    def get(self, request):
+        watermarks = {}
+        for collection in self.collections:
+            value = request.query_params.get(collection)
+            if value is None:
+                continue
+            if not value.isdigit():
+                return Response({collection: 'Watermark must be a non-negative integer'}, status=status.HTTP_400_BAD_REQUEST)
+            watermarks[collection] = int(value)
+        if not watermarks:
+            return Response({'error': f"Pass a watermark for at least one of: {', '.join(self.collections)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # ?fields=/?expand= would mean different things per collection here.
+        context = response_context(request, image_size='small', fields=None, expand=None)
+        payload = {}
+        for collection, watermark in watermarks.items():
+            latest, watermark, has_more = changes_since(collection, request.user, watermark)
+            upserts = [object_id for object_id, deleted in latest.items() if not deleted]
+            rows = list(self.queryset(collection, request, upserts)) if upserts else []
+            found = {row.pk for row in rows}
+            payload[collection] = {
+                'changes': self.serialize(collection, rows, context),
+                'deleted': [object_id for object_id in latest if object_id not in found],
+                'watermark': watermark,
+                'has_more': has_more,
+            }
+        return Response(sideload_users(payload, context))
+
+    def queryset(self, collection, request, ids):
+        rows = current_objects(collection, request.user, ids)
+        if collection == 'ideas':
+            return idea_queryset(request, rows)
+        if collection == 'comments':
+            return rows.prefetch_related(Prefetch('user', queryset=author_queryset()))
+        if collection == 'messages':
+            return rows.prefetch_related(Prefetch('sender', queryset=author_queryset()))
+        if collection == 'notifications':
+            return rows.select_related('sender', 'idea')
+        if collection == 'collaborations':
+            return rows.prefetch_related(
+                Prefetch('idea', queryset=idea_queryset(request)),
+                Prefetch('collaborator', queryset=author_queryset()),
+            )
+        return rows
+
+    def serialize(self, collection, rows, context):
+        serializer_class = {
+            'ideas': IdeaSerializer,
+            'likes': LikeSerializer,
+            'comments': CommentSerializer,
+            'messages': MessageSerializer,
+            'notifications': NotificationEventSerializer,
+            'collaborations': CollaborationSerializer,
+        }[collection]
+        return serializer_class(rows, many=True, context=context).data
@@ -16,10 +16,12 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
+    'channels',
 ]
 
 MIDDLEWARE = [
@@ -51,6 +53,15 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'thinkdrop_backend.wsgi.application'
+ASGI_APPLICATION = 'thinkdrop_backend.asgi.application'
+
+# In-memory layer is enough for tests and a single node; point this at
+# channels_redis.core.RedisChannelLayer when running several.
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+}
 
 DATABASES = {
     'default': {
@@ -64,8 +75,8 @@ DATABASES = {
 }
 
 AUTH_USER_MODEL = 'core.User'
+# One backend, so a login costs one user lookup whether it succeeds or not.
 AUTHENTICATION_BACKENDS = (
-    'django.contrib.auth.backends.ModelBackend',
     'core.backends.EmailBackend',
 )
 AUTH_PASSWORD_VALIDATORS = [
@@ -84,11 +95,68 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 REST_FRAMEWORK = {
+    # Builds request.user from the token and a cached auth record instead of
+    # loading the user row on every request.
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.StatelessJWTAuthentication',
     ),
+    # Failed login attempts, counted in the cache (core.throttles).
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '30/min',
+        'login_account': '5/min',
+    },
+}
+CORS_ALLOW_ALL_ORIGINS = True
+
+# Local memory is per process; point CACHES at a shared backend (e.g.
+# django.core.cache.backends.redis.RedisCache) when running several workers,
+# or cache invalidation in one will not reach the others. Until then a token
+# revoked in one worker is still accepted by the others for up to
+# core.authentication.AUTH_RECORD_TIMEOUT (60 seconds).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Feed, search and category responses. Entries are invalidated by change
+# signals; TIMEOUT (seconds) is only the fallback.
+RESPONSE_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+# manage.py prune_notifications: like/comment notifications older than
+# COMPACT_AFTER_DAYS are folded per idea, read ones older than
+# DELETE_READ_AFTER_DAYS are deleted.
+NOTIFICATION_RETENTION = {
+    'COMPACT_AFTER_DAYS': 7,
+    'DELETE_READ_AFTER_DAYS': 90,
+    'BATCH_SIZE': 1000,
+}
+
+# Trending score (core.trending): likes and comments from the last
+# WINDOW_HOURS, each weighted and halved every HALF_LIFE_HOURS. Run
+# refresh_trending on a schedule, e.g. every few minutes.
+TRENDING = {
+    'WINDOW_HOURS': 72,
+    'HALF_LIFE_HOURS': 12,
+    'LIKE_WEIGHT': 1.0,
+    'COMMENT_WEIGHT': 2.0,
 }
-CORS_ALLOW_ALL_ORIGINS = True  
+
+# Rows removed per transaction when deleting an account (core.deletion).
+ACCOUNT_DELETION = {
+    'BATCH_SIZE': 500,
+}
+
+# Background work (notification fan-out). Use core.tasks.ImmediateBroker in
+# tests to run handlers inline.
+TASK_QUEUE = {
+    'BROKER': 'core.tasks.LocalBroker',
+    'WORKERS': 2,
+    'BATCH_SIZE': 100,
+}  
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -115,3 +183,12 @@ SIMPLE_JWT = {
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Attachment uploads are spooled to disk and checked while streaming.
+UPLOAD_MAX_SIZE = 25 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_ALLOWED_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp', 'application/pdf']
+CHUNKED_UPLOAD_DIR = BASE_DIR / 'media' / 'chunked_uploads'
+# Idle upload sessions are removed by expire_upload_sessions after this long.
+UPLOAD_SESSION_EXPIRY_HOURS = 24
+FILE_UPLOAD_MAX_MEMORY_SIZE = 0